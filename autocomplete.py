@@ -0,0 +1,106 @@
+# Suggestions for the /search query box: game names the bot has seen and
+# past queries that found something often enough, ranked by how often they
+# came up. Entries are kept in a sorted list of keys, one per word start (so
+# "fruits" finds "Blox Fruits"), and a prefix is a bisect range of that list.
+# Nothing here touches the network; Discord drops autocomplete answers after
+# 3 seconds.
+
+import heapq
+import time
+from bisect import bisect_left, insort
+
+MAX_CHOICES = 25
+# Discord's limit for a choice name and value
+MAX_CHOICE_LENGTH = 100
+# an empty or one letter prefix matches a big slice of everything, so those
+# answers are reused for a while instead of ranked on every keystroke
+SHORT_PREFIX = 1
+SHORT_PREFIX_TTL = 30
+# a past query is only suggested once it has been searched this many times,
+# so one person's text doesn't show up in everyone's autocomplete
+MIN_QUERY_COUNT = 3
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+def _word_starts(key):
+    starts = [key]
+    for i, ch in enumerate(key):
+        if ch == " " and i + 1 < len(key):
+            starts.append(key[i + 1:])
+    return starts
+
+class Completer:
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        # sorted (key, entry) pairs; entry is the normalized full text
+        self.keys = []
+        self.entries = {}
+        # queries not seen MIN_QUERY_COUNT times yet
+        self.pending = {}
+        self.short_answers = {}
+        self.lookups = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, text, weight=1):
+        key = normalize(text)
+        if not key or len(key) > MAX_CHOICE_LENGTH:
+            return
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[1] += weight
+            return
+        if len(self.entries) >= self.max_entries:
+            return
+        # shown as typed, minus runs of whitespace
+        self.entries[key] = [" ".join(text.split())[:MAX_CHOICE_LENGTH], weight]
+        for start in _word_starts(key):
+            insort(self.keys, (start, key))
+
+    def add_query(self, text):
+        key = normalize(text)
+        if not key or len(key) > MAX_CHOICE_LENGTH:
+            return
+        if key in self.entries:
+            self.entries[key][1] += 1
+            return
+        count = self.pending.get(key, 0) + 1
+        if count < MIN_QUERY_COUNT:
+            if key in self.pending or len(self.pending) < self.max_entries:
+                self.pending[key] = count
+            return
+        self.pending.pop(key, None)
+        self.add(text, count)
+
+    # learns game names from fetched scripts, like the other indexes
+    def add_many(self, scripts):
+        for script in scripts or ():
+            if script.game_name and script.game_name != "Unknown Game":
+                self.add(script.game_name)
+
+    # -> [display text], most used first
+    def complete(self, prefix, limit=MAX_CHOICES):
+        self.lookups += 1
+        prefix = normalize(prefix)
+        if len(prefix) > SHORT_PREFIX:
+            return self._complete(prefix, limit)
+        now = time.monotonic()
+        cached = self.short_answers.get((prefix, limit))
+        if cached is None or now - cached[0] > SHORT_PREFIX_TTL:
+            cached = self.short_answers[(prefix, limit)] = (now, self._complete(prefix, limit))
+        return cached[1]
+
+    def _complete(self, prefix, limit):
+        if not prefix:
+            best = heapq.nlargest(limit, self.entries.values(), key=lambda entry: entry[1])
+            return [text for text, _ in best]
+        lo = bisect_left(self.keys, (prefix,))
+        hi = bisect_left(self.keys, (prefix + "\uffff",))
+        matches = {self.keys[i][1] for i in range(lo, hi)}
+        best = heapq.nlargest(limit, matches, key=lambda key: self.entries[key][1])
+        return [self.entries[key][0] for key in best]
+
+    def stats(self):
+        return {"entries": len(self.entries), "keys": len(self.keys), "lookups": self.lookups}
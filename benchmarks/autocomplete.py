@@ -0,0 +1,85 @@
+# Latency of autocomplete.Completer.complete() for prefixes of every length,
+# the same lookup the /search query box does on each keystroke, and of
+# games.GameIndex.complete() behind /fetch place_id (names, typos, digits).
+#
+#   python benchmarks/autocomplete.py [--entries 5000 50000] [--games 2000 20000] [--lookups 5000]
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import autocomplete
+import games
+import models
+
+def random_phrase(rng):
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))) for _ in range(rng.randint(1, 4))]
+    return " ".join(words)
+
+def percentile(values, p):
+    return sorted(values)[int(len(values) * p)]
+
+def bench(n, lookups):
+    rng = random.Random(n)
+    completer = autocomplete.Completer(max_entries=n)
+    phrases = [random_phrase(rng) for _ in range(n)]
+    start = time.perf_counter()
+    for phrase in phrases:
+        # a few very popular entries and a long tail, like real searches
+        completer.add(phrase, weight=int(rng.paretovariate(1.2)))
+    build = time.perf_counter() - start
+    by_length = {}
+    for _ in range(lookups):
+        phrase = rng.choice(phrases)
+        typed = phrase[:rng.randint(0, min(len(phrase), 8))]
+        start = time.perf_counter()
+        completer.complete(typed)
+        by_length.setdefault(min(len(typed), 4), []).append(time.perf_counter() - start)
+    everything = [t for times in by_length.values() for t in times]
+    detail = " | ".join(f"{'4+' if length == 4 else length} chars p99 {percentile(times, 0.99) * 1e3:.2f} ms"
+                        for length, times in sorted(by_length.items()))
+    print(f"{len(completer):>6} entries ({len(completer.keys):,} keys, built in {build:.2f}s): "
+          f"p50 {percentile(everything, 0.5) * 1e3:.3f} ms, p99 {percentile(everything, 0.99) * 1e3:.2f} ms | {detail}")
+
+def bench_games(n, lookups):
+    rng = random.Random(n)
+    index = games.GameIndex(max_games=n)
+    names = [random_phrase(rng).title() for _ in range(n)]
+    for i, name in enumerate(names):
+        for _ in range(int(rng.paretovariate(1.2))):
+            index.add(models.Script(source="scriptblox", game_name=name, game_id=str(1000000 + i * 7919)))
+    kinds = {"prefix": [], "typo": [], "digits": []}
+    for _ in range(lookups):
+        kind = rng.choice(list(kinds))
+        name = rng.choice(names)
+        if kind == "prefix":
+            typed = name[:rng.randint(1, min(len(name), 8))]
+        elif kind == "typo":
+            i = rng.randrange(len(name))
+            typed = name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+        else:
+            typed = str(1000000 + rng.randrange(n) * 7919)[:rng.randint(2, 7)]
+        start = time.perf_counter()
+        index.complete(typed)
+        kinds[kind].append(time.perf_counter() - start)
+    detail = " | ".join(f"{kind} p50 {percentile(times, 0.5) * 1e3:.3f} ms, p99 {percentile(times, 0.99) * 1e3:.2f} ms"
+                        for kind, times in kinds.items())
+    print(f"{len(index):>6} games: {detail}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--games", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+    for n in args.entries:
+        bench(n, args.lookups)
+    for n in args.games:
+        bench_games(n, args.lookups)
+
+if __name__ == "__main__":
+    main()
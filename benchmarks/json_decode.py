@@ -0,0 +1,126 @@
+# Compares JSON backends on ScriptBlox / RScripts responses.
+#
+#   python benchmarks/json_decode.py --record          save live responses to benchmarks/responses/
+#   python benchmarks/json_decode.py [files...]        benchmark recorded (or synthetic) responses
+#
+# Also reports how long the event loop stalls when a payload is decoded inline
+# versus through json_backend.loads_async.
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import json_backend
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RESPONSES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "responses")
+RECORD_URLS = {
+    "scriptblox_search.json": "https://scriptblox.com/api/script/search?q=arsenal&mode=free&page=1",
+    "scriptblox_fetch.json": "https://scriptblox.com/api/script/fetch?max=20",
+    "scriptblox_trending.json": "https://scriptblox.com/api/script/trending",
+    "scriptblox_executors.json": "https://scriptblox.com/api/executor/list",
+    "rscripts_scripts.json": "https://rscripts.net/api/v2/scripts?q=arsenal&page=1&notPaid=True",
+    "rscripts_trending.json": "https://rscripts.net/api/v2/trending",
+}
+
+def record():
+    os.makedirs(RESPONSES_DIR, exist_ok=True)
+    for name, url in RECORD_URLS.items():
+        req = urllib.request.Request(url, headers={"User-Agent": "ScriptSearcherBot/bench"})
+        with urllib.request.urlopen(req, timeout=20) as r:
+            body = r.read()
+        with open(os.path.join(RESPONSES_DIR, name), "wb") as f:
+            f.write(body)
+        print(f"saved {name} ({len(body) / 1024:.0f} KB)")
+
+# shaped like a ScriptBlox search page: 20 scripts with full bodies
+def synthetic_payload(script_kb=40):
+    body = "local Players = game:GetService('Players')\n" * (script_kb * 1024 // 44)
+    scripts = [{
+        "_id": f"{i:024x}", "title": f"Script {i}", "slug": f"script-{i}",
+        "game": {"gameId": 286090429, "name": "Arsenal", "imageUrl": "https://example.com/a.png"},
+        "script": body, "views": i * 100, "verified": i % 2 == 0, "key": False,
+        "isPatched": False, "isUniversal": False, "scriptType": "free",
+        "createdAt": "2025-01-01T00:00:00.000Z", "updatedAt": "2025-01-02T00:00:00.000Z",
+        "tags": ["aimbot", "esp"], "owner": {"username": f"user{i}", "verified": True},
+    } for i in range(20)]
+    return json.dumps({"result": {"totalPages": 10, "scripts": scripts}}).encode()
+
+def load_payloads(paths):
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(RESPONSES_DIR, "*.json")))
+    payloads = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            payloads[os.path.basename(path)] = f.read()
+    if not payloads:
+        print("no recorded responses found, using synthetic ScriptBlox pages (run with --record to capture real ones)")
+        payloads = {"synthetic_small.json": synthetic_payload(2), "synthetic_large.json": synthetic_payload(40)}
+    return payloads
+
+def time_decoder(fn, data, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+async def loop_stall(decode, data, rounds):
+    worst = 0.0
+    for _ in range(rounds):
+        ticks = []
+        stop = False
+        async def ticker():
+            last = time.perf_counter()
+            while not stop:
+                await asyncio.sleep(0)
+                now = time.perf_counter()
+                ticks.append(now - last)
+                last = now
+        task = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0)
+        await decode(data)
+        stop = True
+        await task
+        worst = max(worst, max(ticks) if ticks else 0.0)
+    return worst
+
+async def decode_inline(data):
+    json_backend.loads(data)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    if args.record:
+        record()
+        return
+    decoders = {"json": json.loads}
+    if orjson is not None:
+        decoders["orjson"] = orjson.loads
+    print(f"active backend: {json_backend.BACKEND}, offload threshold {json_backend.OFFLOAD_THRESHOLD / 1024:.0f} KB")
+    for name, data in load_payloads(args.files).items():
+        results = {backend: time_decoder(fn, data, args.rounds) for backend, fn in decoders.items()}
+        line = " | ".join(f"{backend} {seconds * 1000:.2f} ms" for backend, seconds in results.items())
+        if "orjson" in results:
+            line += f" | orjson {results['json'] / results['orjson']:.1f}x faster"
+        print(f"{name} ({len(data) / 1024:.0f} KB): {line}")
+        inline = asyncio.run(loop_stall(decode_inline, data, 5))
+        offloaded = asyncio.run(loop_stall(json_backend.loads_async, data, 5))
+        print(f"  worst loop stall: inline {inline * 1000:.2f} ms | loads_async {offloaded * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Ingestion throughput, memory and query latency of search_index.SearchIndex
+# on synthetic scripts (linux only, memory comes from /proc).
+#
+#   python benchmarks/local_index.py [--docs 100000 1000000] [--queries 500]
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import models
+import search_index
+
+GAMES = ["Arsenal", "Blox Fruits", "Da Hood", "Brookhaven", "Pet Simulator 99", "Murder Mystery 2", "Adopt Me",
+         "Jailbreak", "Doors", "Bee Swarm Simulator", "King Legacy", "Anime Defenders", "Blade Ball", "Evade"]
+WORDS = ["auto", "farm", "aimbot", "esp", "silent", "aim", "gui", "hub", "op", "keyless", "script", "fly", "speed",
+         "teleport", "kill", "all", "infinite", "money", "dupe", "raid", "boss", "quest", "chest", "egg", "hatch",
+         "mobile", "best", "new", "updated", "free", "x", "v2", "v3", "admin", "noclip", "god", "mode", "level"]
+
+def synthetic_scripts(n, seed=1):
+    rng = random.Random(seed)
+    # a long tail of made-up words so the vocabulary grows with the corpus
+    # like real titles do
+    rare = [f"{rng.choice(WORDS)}{i}" for i in range(max(1000, n // 20))]
+    for i in range(n):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+        if rng.random() < 0.5:
+            title += " " + rng.choice(rare)
+        yield models.Script(
+            source=rng.choice(("scriptblox", "rscripts")),
+            id=f"{i:024x}",
+            slug=f"script-{i}",
+            title=title,
+            game_name=rng.choice(GAMES),
+            owner=f"user{rng.randint(1, n // 10 + 1)}",
+            tags=tuple(rng.sample(WORDS, rng.randint(0, 3))),
+            views=rng.randint(0, 100000),
+        )
+
+# current (not peak) RSS; the scripts are generated lazily so the delta is
+# what the index itself keeps
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def bench(n, queries):
+    gc.collect()
+    before = rss_bytes()
+    index = search_index.SearchIndex(max_docs=n)
+    start = time.perf_counter()
+    index.add_many(synthetic_scripts(n))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held = rss_bytes() - before
+
+    rng = random.Random(2)
+    latencies = []
+    for _ in range(queries):
+        query = " ".join(rng.choice(WORDS + [g.split()[0].lower() for g in GAMES]) for _ in range(rng.randint(1, 3)))
+        start = time.perf_counter()
+        index.search(query, limit=50)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    st = index.stats()
+    print(f"{n:>9} docs: ingest {n / elapsed:,.0f} docs/s ({elapsed:.1f}s) | "
+          f"RSS +{held / 1048576:,.0f} MB ({held / n:.0f} B/doc) | "
+          f"{st['terms']:,} terms, {st['postings']:,} postings | "
+          f"query p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    for n in args.docs:
+        bench(n, args.queries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Memory held by one open paginator: a page of raw upstream dicts versus the
+# same page converted to models.Script.
+#
+#   python benchmarks/script_memory.py [--sessions 50] [files...]
+#
+# Uses responses recorded with benchmarks/json_decode.py --record when there
+# are any, synthetic ScriptBlox pages otherwise.
+
+import argparse
+import gc
+import glob
+import json
+import os
+import resource
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import models
+from json_decode import RESPONSES_DIR, synthetic_payload
+
+def pages_from(paths):
+    pages = []
+    for path in paths or sorted(glob.glob(os.path.join(RESPONSES_DIR, "*.json"))):
+        with open(path, "rb") as f:
+            data = json.load(f)
+        name = os.path.basename(path)
+        if isinstance(data.get("result"), dict) and "scripts" in data["result"]:
+            pages.append((name, "scriptblox", json.dumps(data["result"]["scripts"]).encode()))
+        elif "scripts" in data:
+            pages.append((name, "rscripts", json.dumps(data["scripts"]).encode()))
+    if not pages:
+        print("no recorded responses found, using synthetic ScriptBlox pages")
+        for kb in (2, 40):
+            raw = json.loads(synthetic_payload(kb))["result"]["scripts"]
+            pages.append((f"synthetic ({kb} KB bodies)", "scriptblox", json.dumps(raw).encode()))
+    return pages
+
+def rss_kb():
+    # ru_maxrss is KB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def held_bytes(build, sessions):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build() for _ in range(sessions)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / sessions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--sessions", type=int, default=50)
+    args = parser.parse_args()
+    for name, api, body in pages_from(args.files):
+        raw = held_bytes(lambda: json.loads(body), args.sessions)
+        slim = held_bytes(lambda: [models.from_api(api, item) for item in json.loads(body)], args.sessions)
+        print(f"{name}: raw dicts {raw / 1024:.1f} KB/session | Script {slim / 1024:.1f} KB/session | "
+              f"saved {(raw - slim) / 1024:.1f} KB ({1 - slim / raw:.0%}) per session, "
+              f"{(raw - slim) * args.sessions / 1048576:.1f} MB over {args.sessions} sessions")
+    print(f"peak RSS {rss_kb() / 1024:.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Lookup latency of spelling.SymSpell as the vocabulary grows, against a
+# brute force Levenshtein scan for comparison.
+#
+#   python benchmarks/spelling.py [--terms 10000 100000 200000] [--lookups 2000]
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import Levenshtein
+import spelling
+
+def random_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+
+def typo(rng, word):
+    i = rng.randrange(len(word))
+    edit = rng.choice(("delete", "insert", "replace"))
+    if edit == "delete" and len(word) > 4:
+        return word[:i] + word[i + 1:]
+    if edit == "insert":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+def percentile(values, p):
+    return sorted(values)[int(len(values) * p)]
+
+def bench(n, lookups):
+    rng = random.Random(n)
+    words = list({random_word(rng) for _ in range(n)})
+    index = spelling.SymSpell(max_terms=len(words))
+    start = time.perf_counter()
+    for word in words:
+        index.add(word)
+    build = time.perf_counter() - start
+    queries = [typo(rng, rng.choice(words)) for _ in range(lookups)]
+    latencies = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        if index.lookup(query):
+            found += 1
+        latencies.append(time.perf_counter() - start)
+    brute = []
+    for query in queries[:50]:
+        start = time.perf_counter()
+        min(words, key=lambda w: Levenshtein.distance(query, w, score_cutoff=3))
+        brute.append(time.perf_counter() - start)
+    print(f"{len(words):>7} terms: build {build:.1f}s, {len(index.deletes):,} delete keys | "
+          f"lookup p50 {percentile(latencies, 0.5) * 1e6:.0f} us, p99 {percentile(latencies, 0.99) * 1e6:.0f} us, "
+          f"{found / lookups:.0%} corrected | brute force p50 {percentile(brute, 0.5) * 1e3:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terms", type=int, nargs="+", default=[10000, 100000, 200000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    for n in args.terms:
+        bench(n, args.lookups)
+
+if __name__ == "__main__":
+    main()
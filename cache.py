@@ -0,0 +1,204 @@
+# In-process caches for upstream responses.
+
+import asyncio
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+# TTL cache with LRU eviction once maxsize is hit
+class TTLCache:
+    def __init__(self, ttl, maxsize=1000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            # expired entries stay around (until LRU evicts them) for get_stale
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    # ignores the TTL; used to serve something while an upstream is down
+    def get_stale(self, key, default=None):
+        entry = self._data.get(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key, value, ttl=None):
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        entry = self._data.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+def normalize_query(query):
+    return " ".join((query or "").lower().split())
+
+# filters come in as kwargs; drop unset ones and sort so the key is stable
+def normalize_filters(filters):
+    items = []
+    for name, value in filters.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        items.append((name, value))
+    return tuple(sorted(items))
+
+def search_key(api, query, mode, page, filters):
+    return (api, normalize_query(query), (mode or "").lower(), int(page), normalize_filters(filters))
+
+# Coalesces concurrent calls for the same key into one upstream request.
+# Every waiter gets the same result, or the same exception re-raised. A waiter
+# being cancelled only cancels its own wait; the shared call keeps running for
+# the others and is dropped from the in-flight table once it finishes.
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {"in_flight": len(self._calls), "started": self.started, "coalesced": self.coalesced}
+
+# Stale-while-revalidate cache for (data, error) returning fetchers.
+# Younger than fresh_ttl: served as is. Between fresh_ttl and hard_ttl: served
+# immediately while one background refresh runs. Older than hard_ttl (or never
+# fetched): the caller waits for fresh data. Errors are never stored, so a
+# failed refresh keeps serving the last good payload until hard_ttl.
+# With a store (disk_cache.DiskCache), payloads are also persisted under
+# namespace and reloaded, with their original age, after a restart; encode and
+# decode turn them into something JSON can hold and back.
+class SWRCache:
+    def __init__(self, fresh_ttl, hard_ttl, store=None, namespace=None, encode=None, decode=None):
+        self.fresh_ttl = fresh_ttl
+        self.hard_ttl = hard_ttl
+        self.store = store
+        self.namespace = namespace
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+        self._data = {}
+        self._refreshing = {}
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def get(self, key, fn):
+        entry = self._data.get(key)
+        if entry is None and self.store is not None:
+            found = await self.store.get_with_age(self.namespace, key)
+            if found is not None:
+                value, age = found
+                value = self.decode(value)
+                entry = self._data[key] = (time.monotonic() - age, value)
+        if entry is not None:
+            fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if age < self.fresh_ttl:
+                self.fresh_hits += 1
+                return value, None
+            if age < self.hard_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key, fn)
+                return value, None
+        self.misses += 1
+        return await self.refresh(key, fn)
+
+    async def refresh(self, key, fn):
+        value, error = await fn()
+        if error is None:
+            self._data[key] = (time.monotonic(), value)
+            if self.store is not None:
+                await self.store.set(self.namespace, key, self.encode(value), self.hard_ttl)
+        return value, error
+
+    def _refresh_in_background(self, key, fn):
+        if key in self._refreshing:
+            return
+        async def run():
+            self.refreshes += 1
+            try:
+                _, error = await self.refresh(key, fn)
+                if error is not None:
+                    self.refresh_failures += 1
+            except Exception:
+                self.refresh_failures += 1
+            finally:
+                self._refreshing.pop(key, None)
+        self._refreshing[key] = asyncio.ensure_future(run())
+
+    def age(self, key):
+        entry = self._data.get(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "fresh_ttl": self.fresh_ttl,
+            "hard_ttl": self.hard_ttl,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
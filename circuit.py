@@ -0,0 +1,110 @@
+# Circuit breaker per upstream API. After enough consecutive failures (slow
+# responses count as failures) the breaker opens and calls fail immediately
+# with CircuitOpenError. Once OPEN_SECONDS have passed one probe request is let
+# through: success closes the breaker again, failure re-opens it.
+
+import time
+import aiohttp
+
+FAILURE_THRESHOLD = 5
+LATENCY_THRESHOLD = 8.0
+OPEN_SECONDS = 30
+
+UPSTREAMS = {
+    "scriptblox.com": "scriptblox",
+    "rscripts.net": "rscripts",
+    "rawscripts.net": "rawscripts",
+}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# subclasses ClientError so fetch helpers already catching
+# http_client.REQUEST_ERRORS report it like any other upstream failure
+class CircuitOpenError(aiohttp.ClientError):
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} is unavailable right now, try again in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, latency_threshold=LATENCY_THRESHOLD, open_seconds=OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error = None
+
+    def before_call(self):
+        if self.state == CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.name, max(0.0, self.opened_at + self.open_seconds - now))
+
+    def record_success(self, latency):
+        if latency > self.latency_threshold:
+            self.record_failure(f"slow response ({latency:.1f}s)")
+            return
+        self.probing = False
+        self.failures = 0
+        self.state = CLOSED
+
+    def record_failure(self, error):
+        self.probing = False
+        self.failures += 1
+        self.last_error = str(error)
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    # a probe that ended without a verdict (e.g. a 4xx) shouldn't block the next one
+    def release(self):
+        self.probing = False
+
+    def reset(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def status(self):
+        retry_in = 0.0
+        if self.state == OPEN:
+            retry_in = max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in": retry_in,
+            "last_error": self.last_error,
+        }
+
+_breakers = {name: CircuitBreaker(name) for name in UPSTREAMS.values()}
+
+def breaker_for_host(host):
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    name = UPSTREAMS.get(host)
+    return _breakers.get(name) if name else None
+
+def get(name):
+    return _breakers.get(name)
+
+def all_status():
+    return {name: breaker.status() for name, breaker in _breakers.items()}
@@ -0,0 +1,157 @@
+# Background sync of each source's whole catalog into the disk store, so the
+# local indexes can answer while upstream is down and come back warm after a
+# restart. Every run walks the source's "recently updated" listing from the
+# top and stops at the first script no newer than the watermark, the newest
+# updatedAt of the last finished run. Progress is checkpointed after every
+# page, so a run cut short by a restart or the page budget carries on where
+# it stopped.
+#
+# Crawling gets its own token bucket per source on top of the host limits,
+# a cap on pages per run, and waits while users have requests queued.
+
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+import models
+import ratelimit
+import sources
+import warmer
+
+# the watermark says everything older is synced, so catalog rows have to
+# live as long as the checkpoint; both are pinned in the disk cache
+CATALOG_TTL = 365 * 24 * 3600
+CHECKPOINT_TTL = 365 * 24 * 3600
+NAMESPACES = ("catalog", "crawler")
+LOAD_CHUNK = 500
+
+def _timestamp(value):
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+class CatalogCrawler:
+    # ingest(scripts) feeds the in-memory indexes with what's on disk
+    def __init__(self, store, ingest, interval, rate, max_pages):
+        self.store = store
+        self.ingest = ingest
+        self.interval = interval
+        self.rate = rate
+        self.max_pages = max_pages
+        self.buckets = {}
+        self.task = None
+        self.stats = {}
+
+    def _stats(self, name):
+        return self.stats.setdefault(name, {
+            "runs": 0, "pages": 0, "seen": 0, "stored": 0, "failures": 0,
+            "busy_time": 0.0, "last_run": None, "watermark": 0.0, "resume_page": None,
+        })
+
+    def start(self):
+        if self.task is None and self.interval > 0:
+            self.task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    # puts everything synced before the last restart back into the indexes
+    async def load(self):
+        loaded = 0
+        cursor = 0
+        while True:
+            rows, cursor = await self.store.items("catalog", cursor, LOAD_CHUNK)
+            if not rows:
+                return loaded
+            self.ingest([models.Script.from_dict(value) for _, value in rows])
+            loaded += len(rows)
+
+    async def _loop(self):
+        await self.load()
+        while True:
+            for source in sources.all_sources():
+                try:
+                    await self.sync(source)
+                except Exception as e:
+                    self._stats(source.name)["failures"] += 1
+                    print(f"Catalog sync for {source.name} failed: {e}")
+            await asyncio.sleep(self.interval * random.uniform(0.8, 1.2))
+
+    async def _wait_turn(self, name):
+        # users first: hold off while anything is queued on the host buckets
+        while warmer.interactive_busy():
+            await asyncio.sleep(warmer.BUSY_RETRY_DELAY)
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            bucket = self.buckets[name] = ratelimit.TokenBucket(self.rate, 1)
+        await bucket.acquire()
+
+    async def sync(self, source):
+        st = self._stats(source.name)
+        checkpoint = await self.store.get("crawler", source.name) or {}
+        watermark = checkpoint.get("watermark", 0.0)
+        newest = checkpoint.get("newest", watermark)
+        page = checkpoint.get("page") or 1
+        started = time.monotonic()
+        run = {"pages": 0, "seen": 0, "stored": 0, "caught_up": False}
+        try:
+            while run["pages"] < self.max_pages:
+                await self._wait_turn(source.name)
+                # the registered sources index whatever they fetch
+                scripts, total_pages = await source.recent(page)
+                run["pages"] += 1
+                fresh = []
+                for script in scripts:
+                    updated = _timestamp(script.updated_at or script.created_at)
+                    if updated and updated <= watermark:
+                        run["caught_up"] = True
+                        break
+                    fresh.append(script)
+                    newest = max(newest, updated)
+                run["seen"] += len(scripts)
+                for script in fresh:
+                    await self.store.set("catalog", (script.source, script.id or script.slug), script.to_dict(), CATALOG_TTL)
+                run["stored"] += len(fresh)
+                last_page = not scripts or (total_pages is not None and page >= total_pages)
+                if run["caught_up"] or last_page:
+                    run["caught_up"] = True
+                    # finished: everything up to newest is synced
+                    checkpoint = {"watermark": newest, "newest": newest, "page": None}
+                    break
+                page += 1
+                checkpoint = {"watermark": watermark, "newest": newest, "page": page}
+                await self.store.set("crawler", source.name, checkpoint, CHECKPOINT_TTL)
+        finally:
+            await self.store.set("crawler", source.name, checkpoint, CHECKPOINT_TTL)
+            elapsed = time.monotonic() - started
+            st["runs"] += 1
+            st["pages"] += run["pages"]
+            st["seen"] += run["seen"]
+            st["stored"] += run["stored"]
+            st["busy_time"] += elapsed
+            st["watermark"] = checkpoint.get("watermark", 0.0)
+            st["resume_page"] = checkpoint.get("page")
+            st["last_run"] = dict(run, elapsed=elapsed)
+        return run
+
+    # one line per source for !cachestats
+    def report(self):
+        lines = []
+        for name, st in self.stats.items():
+            rate = st["stored"] / st["busy_time"] * 60 if st["busy_time"] else 0.0
+            mark = datetime.fromtimestamp(st["watermark"], timezone.utc).strftime("%Y-%m-%d %H:%M") if st["watermark"] else "none"
+            line = (f"**crawl {name}**: {st['runs']} runs | {st['pages']} pages | {st['seen']} seen | "
+                    f"{st['stored']} new or changed | {rate:.0f} scripts/min | synced up to {mark}")
+            if st["resume_page"]:
+                line += f" | resumes at page {st['resume_page']}"
+            if st["failures"]:
+                line += f" | {st['failures']} failed"
+            lines.append(line)
+        return lines
@@ -0,0 +1,132 @@
+# Collapses reuploads in a result list. Two scripts are the same if they share
+# an exact fingerprint: the URL of a body that's nothing but a loadstring
+# line (or RScripts' raw URL), the hash of the normalized body, or owner +
+# title + game (one person posting to both sites). Bodies that were
+# edited a little are caught with MinHash: one-permutation hashing of word
+# 3-shingles into SIGNATURE_BINS bins, banded for LSH, with the estimated
+# Jaccard similarity checked before two scripts are merged.
+#
+# ScriptBlox bodies are cut at models.MAX_BODY_CHARS; longer scripts are only
+# matched on owner + title + game. RScripts only gives us a raw URL.
+
+import hashlib
+import re
+import cache
+
+SIGNATURE_BINS = 64
+BAND_ROWS = 4
+NEAR_DUPLICATE_SIMILARITY = 0.8
+# fewer shingles than this and the estimate is too noisy to trust
+MIN_SHINGLES = 20
+
+_loader_re = re.compile(r"""loadstring\s*\(\s*game\s*:\s*httpget(?:async)?\s*\(\s*["']([^"']+)["']\s*(?:,\s*\w+\s*)?\)\s*\)\s*\(\s*\)\s*;?""")
+_comment_re = re.compile(r"--\[(=*)\[.*?\]\1\]|--[^\n]*", re.DOTALL)
+_word_re = re.compile(r"\w+")
+
+fingerprints = cache.TTLCache(ttl=24 * 3600, maxsize=20000)
+
+def normalize_url(url):
+    url = url.strip().lower()
+    url = re.sub(r"^https?://", "", url).rstrip("/")
+    # raw.githubusercontent.com/user/repo/refs/heads/main/x == .../main/x
+    return url.replace("/refs/heads/", "/")
+
+def _signature(tokens):
+    bins = [None] * SIGNATURE_BINS
+    for i in range(len(tokens) - 2):
+        h = hash((tokens[i], tokens[i + 1], tokens[i + 2]))
+        b = h % SIGNATURE_BINS
+        if bins[b] is None or h < bins[b]:
+            bins[b] = h
+    return tuple(bins)
+
+def similarity(a, b):
+    filled = [(x, y) for x, y in zip(a, b) if x is not None or y is not None]
+    if not filled:
+        return 0.0
+    return sum(1 for x, y in filled if x == y) / len(filled)
+
+class Fingerprint:
+    __slots__ = ("keys", "signature")
+
+    def __init__(self, keys, signature):
+        self.keys = keys
+        self.signature = signature
+
+def fingerprint(script):
+    cache_key = (script.source, script.id or script.slug, script.updated_at, bool(script.body))
+    found = fingerprints.get(cache_key)
+    if found is not None:
+        return found
+    keys = set()
+    signature = None
+    # a cut body is mostly whatever the script starts with, often a UI
+    # library many hubs inline, so it says nothing about the script itself
+    if script.body and not script.body_truncated:
+        text = _comment_re.sub(" ", script.body).lower()
+        # a URL only identifies a script whose whole body is the loader;
+        # bigger scripts pull in shared UI libraries the same way
+        loader = _loader_re.fullmatch(text.strip())
+        if loader:
+            keys.add("url:" + normalize_url(loader.group(1)))
+        tokens = _word_re.findall(text)
+        if tokens:
+            keys.add("body:" + hashlib.blake2b(" ".join(tokens).encode(), digest_size=12).hexdigest())
+        if len(tokens) - 2 >= MIN_SHINGLES:
+            signature = _signature(tokens)
+    if script.raw_url:
+        keys.add("url:" + normalize_url(script.raw_url))
+    if script.owner != "Unknown" and script.title != "No Title":
+        game = script.game_id or script.game_name.lower()
+        keys.add("same:" + "|".join((script.owner.lower(), " ".join(_word_re.findall(script.title.lower())), game)))
+    found = Fingerprint(frozenset(keys), signature)
+    fingerprints.set(cache_key, found)
+    return found
+
+# -> (kept scripts, mirror count for each); the first script of a group,
+# i.e. the best ranked one, is the one kept
+def collapse(scripts):
+    parent = list(range(len(scripts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    owner_of = {}
+    bands = {}
+    prints = [fingerprint(script) for script in scripts]
+    for i, fp in enumerate(prints):
+        for key in fp.keys:
+            if key in owner_of:
+                union(owner_of[key], i)
+            else:
+                owner_of[key] = i
+        if fp.signature is None:
+            continue
+        for band in range(0, SIGNATURE_BINS, BAND_ROWS):
+            rows = fp.signature[band:band + BAND_ROWS]
+            if None in rows:
+                continue
+            for j in bands.setdefault((band, rows), []):
+                if find(j) != find(i) and similarity(prints[j].signature, fp.signature) >= NEAR_DUPLICATE_SIMILARITY:
+                    union(j, i)
+            bands[(band, rows)].append(i)
+    kept = []
+    position = {}
+    mirrors = []
+    for i, script in enumerate(scripts):
+        root = find(i)
+        if root == i:
+            position[i] = len(kept)
+            kept.append(script)
+            mirrors.append(0)
+        else:
+            mirrors[position[root]] += 1
+    return kept, mirrors
@@ -0,0 +1,189 @@
+# Persistent cache tier behind the in-memory caches, so a restart doesn't mean
+# re-fetching everything from upstream. One SQLite database in WAL mode; all
+# queries run in a worker thread so the event loop never blocks on disk.
+# Values are stored as JSON, keys are JSON-encoded cache keys.
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at);
+CREATE INDEX IF NOT EXISTS cache_stored ON cache (stored_at);
+"""
+
+# bump when the shape of stored values changes; older databases are emptied
+FORMAT_VERSION = 2
+
+class DiskCache:
+    # pinned namespaces only go when they expire: they're left out of the
+    # size cap and never evicted to meet it
+    def __init__(self, path, max_bytes, pinned=()):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.pinned = tuple(pinned)
+        self.conn = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.conn is not None
+
+    async def open(self):
+        try:
+            await asyncio.to_thread(self._open)
+        except sqlite3.Error as e:
+            print(f"Disk cache disabled, couldn't open {self.path}: {e}")
+            self.conn = None
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # auto_vacuum only takes effect if set before the first table exists
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        if conn.execute("PRAGMA user_version").fetchone()[0] != FORMAT_VERSION:
+            conn.execute("DELETE FROM cache")
+            conn.execute(f"PRAGMA user_version={FORMAT_VERSION}")
+        conn.commit()
+        self.conn = conn
+
+    async def close(self):
+        if self.conn is None:
+            return
+        conn, self.conn = self.conn, None
+        await asyncio.to_thread(self._close, conn)
+
+    def _close(self, conn):
+        with self.lock:
+            conn.close()
+
+    # returns (value, age in seconds) or None
+    async def get_with_age(self, namespace, key):
+        if self.conn is None:
+            return None
+        try:
+            row = await asyncio.to_thread(self._get, namespace, json.dumps(key))
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value, stored_at = row
+        return json.loads(value), max(0.0, time.time() - stored_at)
+
+    async def get(self, namespace, key):
+        found = await self.get_with_age(namespace, key)
+        return None if found is None else found[0]
+
+    def _get(self, namespace, key):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT value, stored_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+
+    async def set(self, namespace, key, value, ttl):
+        if self.conn is None:
+            return
+        try:
+            await asyncio.to_thread(self._set, namespace, json.dumps(key), json.dumps(value), ttl)
+            self.writes += 1
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Disk cache write failed: {e}")
+
+    def _set(self, namespace, key, value, ttl):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, stored_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, value, len(value), now, now + ttl),
+            )
+            self.conn.commit()
+
+    # up to limit live (key, value) rows of a namespace after the given
+    # cursor -> (rows, cursor for the next call); decoding happens in the
+    # worker thread so big namespaces don't stall the loop
+    async def items(self, namespace, after=0, limit=500):
+        if self.conn is None:
+            return [], after
+        try:
+            return await asyncio.to_thread(self._items, namespace, after, limit)
+        except sqlite3.Error:
+            return [], after
+
+    def _items(self, namespace, after, limit):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT rowid, key, value FROM cache WHERE namespace = ? AND rowid > ? AND expires_at > ? ORDER BY rowid LIMIT ?",
+                (namespace, after, time.time(), limit),
+            ).fetchall()
+        if not rows:
+            return [], after
+        return [(json.loads(key), json.loads(value)) for _, key, value in rows], rows[-1][0]
+
+    # drops expired rows, then the oldest unpinned rows until the size cap is met
+    async def vacuum(self):
+        if self.conn is None:
+            return
+        await asyncio.to_thread(self._vacuum)
+
+    def _vacuum(self):
+        with self.lock:
+            conn = self.conn
+            removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            unpinned = f"namespace NOT IN ({', '.join('?' * len(self.pinned))})" if self.pinned else "1"
+            total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM cache WHERE {unpinned}", self.pinned).fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                doomed = []
+                for rowid, size in conn.execute(f"SELECT rowid, size FROM cache WHERE {unpinned} ORDER BY stored_at", self.pinned):
+                    doomed.append((rowid,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM cache WHERE rowid = ?", doomed)
+                removed += len(doomed)
+            conn.commit()
+            conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.evictions += removed
+
+    async def stats(self):
+        row = (0, 0)
+        if self.conn is not None:
+            try:
+                row = await asyncio.to_thread(self._totals)
+            except sqlite3.Error:
+                pass
+        return {
+            "enabled": self.enabled,
+            "entries": row[0],
+            "bytes": row[1],
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    def _totals(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
@@ -0,0 +1,82 @@
+# "All sources" search: every registered source is queried at once and the
+# answers are merged into one list ranked by score(). search_all() yields each
+# source's answer as soon as it lands, so a slow site never holds back the
+# results of a fast one.
+
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timezone
+import sources
+
+# RANK_WEIGHTS="views=1,likes=1.5,recency=2,verified=1"; missing names keep the default
+DEFAULT_WEIGHTS = {"views": 1.0, "likes": 1.5, "recency": 2.0, "verified": 1.0}
+RECENCY_HALF_LIFE_DAYS = 30
+
+def parse_weights(spec):
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        name = name.strip().lower()
+        if name in weights:
+            try:
+                weights[name] = float(value)
+            except ValueError:
+                pass
+    return weights
+
+WEIGHTS = parse_weights(os.getenv("RANK_WEIGHTS"))
+
+def _age_days(timestamp, now):
+    try:
+        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - dt.timestamp()) / 86400)
+
+# views and likes are log scaled so one viral script doesn't drown out the rest;
+# recency halves every RECENCY_HALF_LIFE_DAYS and is worth at most 1
+def score(script, weights=WEIGHTS, now=None):
+    now = time.time() if now is None else now
+    age = _age_days(script.updated_at or script.created_at, now)
+    recency = 0.5 ** (age / RECENCY_HALF_LIFE_DAYS) if age is not None else 0.0
+    return (weights["views"] * math.log10(1 + max(script.views or 0, 0))
+            + weights["likes"] * math.log10(1 + max(script.likes or 0, 0))
+            + weights["recency"] * recency
+            + weights["verified"] * (1 if script.verified else 0))
+
+def rank(scripts, weights=WEIGHTS):
+    now = time.time()
+    return sorted(scripts, key=lambda script: score(script, weights, now), reverse=True)
+
+# yields (source name, scripts, total_pages, error) in the order sources answer;
+# the other requests are cancelled if the caller stops iterating early
+async def search_all(query, mode, page, **filters):
+    async def one(source):
+        try:
+            scripts, total_pages = await source.search(query, mode, page, **filters)
+            return source.name, scripts or [], total_pages, None
+        except Exception as e:
+            return source.name, None, None, e
+
+    tasks = [asyncio.ensure_future(one(source)) for source in sources.all_sources()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+# waits for every source; used for pages after the first, which are prefetched
+async def search_all_merged(query, mode, page, **filters):
+    merged = []
+    errors = []
+    async for _, scripts, _, error in search_all(query, mode, page, **filters):
+        if error is not None:
+            errors.append(error)
+        else:
+            merged.extend(scripts)
+    return rank(merged), errors
@@ -0,0 +1,85 @@
+# Game name -> place id, learned from the game object on every fetched
+# script, for the /fetch place_id autocomplete. Names are matched by prefix
+# through an autocomplete.Completer, typed digits by place id prefix, and a
+# name with a typo in it through a symmetric delete index of the words in
+# game names.
+
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+import autocomplete
+import spelling
+from search_index import tokenize
+
+class GameIndex:
+    def __init__(self, max_games=20000):
+        self.names = autocomplete.Completer(max_entries=max_games)
+        self.words = spelling.SymSpell(max_terms=max_games * 2)
+        # normalized name -> Counter of place ids seen with it
+        self.place_ids = {}
+        # sorted (place id, normalized name) pairs for digit prefixes
+        self.id_keys = []
+
+    def __len__(self):
+        return len(self.place_ids)
+
+    def add(self, script):
+        if not script.game_id or not script.game_id.isdigit() or script.game_name in ("", "Unknown Game"):
+            return
+        key = autocomplete.normalize(script.game_name)
+        ids = self.place_ids.get(key)
+        if ids is None:
+            if len(self.place_ids) >= self.names.max_entries:
+                return
+            ids = self.place_ids[key] = Counter()
+            for word in tokenize(key):
+                self.words.add(word)
+        if script.game_id not in ids:
+            insort(self.id_keys, (script.game_id, key))
+        ids[script.game_id] += 1
+        self.names.add(script.game_name)
+
+    def add_many(self, scripts):
+        for script in scripts or ():
+            self.add(script)
+
+    # most common place id for a game name, or None
+    def resolve(self, name):
+        ids = self.place_ids.get(autocomplete.normalize(name))
+        if not ids:
+            return None
+        return ids.most_common(1)[0][0]
+
+    # -> [(game name, place id)], best first
+    def complete(self, current, limit=autocomplete.MAX_CHOICES):
+        current = (current or "").strip()
+        if current.isdigit():
+            lo = bisect_left(self.id_keys, (current,))
+            hi = bisect_left(self.id_keys, (current + "\uffff",))
+            matches = heapq.nlargest(limit, self.id_keys[lo:hi], key=lambda item: self.place_ids[item[1]][item[0]])
+            return [(self.names.entries[key][0], place_id) for place_id, key in matches]
+        names = self.names.complete(current, limit)
+        if len(names) < limit and current:
+            corrected = self._correct(current)
+            if corrected:
+                names += [name for name in self.names.complete(corrected, limit) if name not in names]
+        return [(name, self.resolve(name)) for name in names[:limit]]
+
+    # every whole word fixed against known game words; the last one may
+    # still be being typed, so it's only fixed if it matches nothing as is
+    def _correct(self, text):
+        words = tokenize(text)
+        corrected = []
+        changed = False
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            if word not in self.words and not (last and self.names.complete(" ".join(corrected + [word]), 1)):
+                match = self.words.lookup(word, 1 if len(word) <= 5 else 2)
+                if match:
+                    word = match[0]
+                    changed = True
+            corrected.append(word)
+        return " ".join(corrected) if changed else None
+
+    def stats(self):
+        return {"games": len(self.place_ids), "place_ids": len(self.id_keys), "lookups": self.names.lookups}
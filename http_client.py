@@ -0,0 +1,125 @@
+# Shared async HTTP client used by every upstream fetch in main.py.
+# One aiohttp session (and so one keep-alive connection pool) for the whole bot,
+# created lazily on the running loop and closed when the bot shuts down.
+
+import asyncio
+import time
+import aiohttp
+from urllib.parse import urlsplit
+import ratelimit
+import circuit
+import cache
+import json_backend
+
+USER_AGENT = "ScriptSearcherBot/2.6"
+TIMEOUT = aiohttp.ClientTimeout(total=20, connect=5)
+MAX_CONNECTIONS = 100
+MAX_CONNECTIONS_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 30
+MAX_RATE_LIMIT_RETRIES = 3
+VALIDATOR_TTL = 24 * 3600
+
+# what fetch helpers should catch instead of requests.RequestException
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+_session = None
+# url -> (etag, last_modified, data) for conditional requests; only small
+# listings (the executor list) use this, it keeps a copy of the payload
+_validators = cache.TTLCache(ttl=VALIDATOR_TTL, maxsize=50)
+_endpoint_stats = {}
+
+def _record(endpoint, size, not_modified=False):
+    st = _endpoint_stats.setdefault(endpoint, {"requests": 0, "not_modified": 0, "bytes": 0})
+    st["requests"] += 1
+    st["bytes"] += size
+    if not_modified:
+        st["not_modified"] += 1
+
+def endpoint_stats():
+    return _endpoint_stats
+
+def get_session():
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(connector=connector, timeout=TIMEOUT, headers={"User-Agent": USER_AGENT})
+    return _session
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+# conditional=True sends the ETag / Last-Modified seen last time for this url
+# and reuses the stored body on a 304. endpoint groups urls for the stats,
+# e.g. every /api/script/{slug} under one name.
+async def get_json(url, headers=None, conditional=False, endpoint=None):
+    session = get_session()
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    endpoint = endpoint or f"{host}{parts.path}"
+    bucket = ratelimit.bucket_for(host)
+    breaker = circuit.breaker_for_host(host)
+    stored = _validators.get(url) if conditional else None
+    request_headers = dict(headers or {})
+    if stored is not None:
+        etag, last_modified, _ = stored
+        if etag:
+            request_headers["If-None-Match"] = etag
+        if last_modified:
+            request_headers["If-Modified-Since"] = last_modified
+    attempt = 0
+    while True:
+        await bucket.acquire()
+        if breaker:
+            breaker.before_call()
+        start = time.monotonic()
+        try:
+            async with session.get(url, headers=request_headers) as r:
+                delay = ratelimit.backoff_from_headers(r.headers)
+                if r.status == 429:
+                    bucket.pause(delay if delay is not None else 2 ** attempt, throttled=True)
+                    if attempt < MAX_RATE_LIMIT_RETRIES:
+                        attempt += 1
+                        if breaker:
+                            breaker.release()
+                        continue
+                elif delay is not None:
+                    bucket.pause(delay)
+                if r.status == 304 and stored is not None:
+                    _record(endpoint, 0, not_modified=True)
+                    data = stored[2]
+                    _validators.set(url, stored)
+                else:
+                    r.raise_for_status()
+                    body = await r.read()
+                    _record(endpoint, len(body))
+                    # scriptblox sometimes answers with text/html content type, so don't trust it
+                    data = await json_backend.loads_async(body)
+                    if conditional and (r.headers.get("ETag") or r.headers.get("Last-Modified")):
+                        _validators.set(url, (r.headers.get("ETag"), r.headers.get("Last-Modified"), data))
+        except aiohttp.ClientResponseError as e:
+            # only server errors say anything about the upstream being down
+            if breaker:
+                if e.status >= 500:
+                    breaker.record_failure(e)
+                else:
+                    breaker.release()
+            raise
+        except REQUEST_ERRORS as e:
+            if breaker:
+                breaker.record_failure(e)
+            raise
+        except BaseException:
+            if breaker:
+                breaker.release()
+            raise
+        if breaker:
+            breaker.record_success(time.monotonic() - start)
+        return data
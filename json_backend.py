@@ -0,0 +1,30 @@
+# JSON decoding for upstream responses. Uses orjson when it's installed and
+# the stdlib json module otherwise.
+#
+# Payloads above OFFLOAD_THRESHOLD are decoded in a worker thread. Both
+# decoders hold the GIL for the whole parse though, so in
+# benchmarks/json_decode.py the thread hop made event loop stalls longer, not
+# shorter, for every real response size. The default threshold is therefore
+# high enough that only pathological payloads take that path.
+
+import asyncio
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+OFFLOAD_THRESHOLD = int(os.getenv("JSON_OFFLOAD_BYTES", str(16 * 1024 * 1024)))
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+async def loads_async(data):
+    if len(data) >= OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(loads, data)
+    return loads(data)
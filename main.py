@@ -4,18 +4,58 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import requests
 import os
 import asyncio
+import time
 from datetime import datetime, timezone
 from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv
 import validators
-import urllib.parse
+import http_client
+import cache
+import prefetch
+import ratelimit
+import circuit
+import popular
+import warmer
+import disk_cache
+import models
+import sources
+import middleware
+import federated
+import progressive
+import search_index
+import spelling
+import autocomplete
+import games
+import dedupe
+import crawler
+import pagination
 
 load_dotenv()
 TOKEN = os.getenv("BOT_TOKEN")
 FALLBACK_IMAGE = "https://c.tenor.com/jnINmQlMNbsAAAAC/tenor.gif"
+SCRIPT_DETAIL_TTL = 600
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "500"))
+TRENDING_FRESH_TTL = int(os.getenv("TRENDING_FRESH_TTL", "300"))
+TRENDING_HARD_TTL = int(os.getenv("TRENDING_HARD_TTL", "3600"))
+EXECUTORS_FRESH_TTL = int(os.getenv("EXECUTORS_FRESH_TTL", "900"))
+EXECUTORS_HARD_TTL = int(os.getenv("EXECUTORS_HARD_TTL", "21600"))
+WARM_TOP_QUERIES = int(os.getenv("WARM_TOP_QUERIES", "10"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache.sqlite3")
+CACHE_DB_MAX_MB = int(os.getenv("CACHE_DB_MAX_MB", "200"))
+DISK_SEARCH_TTL = 6 * 3600
+DISK_SCRIPT_TTL = 24 * 3600
+DISK_VACUUM_INTERVAL = 15 * 60
+SCRIPTS_PER_PAGE = 5
+LOCAL_INDEX_MAX_DOCS = int(os.getenv("LOCAL_INDEX_MAX_DOCS", "200000"))
+LOCAL_SEARCH_LIMIT = 100
+CRAWL_INTERVAL = int(os.getenv("CRAWL_INTERVAL", "1800"))
+CRAWL_RATE = float(os.getenv("CRAWL_RATE", "0.2"))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "200"))
+USER_PAGES_CONCURRENCY = 4
+USER_PAGES_MAX = 30
 intents = discord.Intents.default()
 intents.message_content = True
 
@@ -23,8 +63,28 @@ class MyBot(commands.Bot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.active_searches = {}
+        self.warmer = None
+        self.crawler = None
     async def setup_hook(self):
         await self.tree.sync()
+        if not persistent_cache.enabled:
+            await persistent_cache.open()
+        # setup_hook runs again on every reconnect in run_bot
+        if self.warmer is None:
+            self.warmer = build_warmer()
+            self.warmer.start()
+        # without the disk cache nothing would keep what it syncs, or where it got to
+        if self.crawler is None and persistent_cache.enabled:
+            self.crawler = crawler.CatalogCrawler(persistent_cache, index_scripts, CRAWL_INTERVAL, CRAWL_RATE, CRAWL_MAX_PAGES)
+            self.crawler.start()
+    async def close(self):
+        if self.crawler:
+            await self.crawler.stop()
+        if self.warmer:
+            await self.warmer.stop()
+        await persistent_cache.close()
+        await http_client.close_session()
+        await super().close()
 
 bot = MyBot(command_prefix='!', intents=intents)
 
@@ -35,174 +95,134 @@ async def on_ready():
     print(f"Bot is ready 🤖 | Serving in {len(bot.guilds)} servers")
     print(f"Commands: /search, /fetch, /trending, /script, /executors, /rscripts_*")
 
-def fetch_scripts(api, query, mode, page, **filters):
+persistent_cache = disk_cache.DiskCache(CACHE_DB_PATH, CACHE_DB_MAX_MB * 1024 * 1024, pinned=crawler.NAMESPACES)
+background_tasks = set()
+
+def spawn(coro):
+    task = asyncio.ensure_future(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+def upstream_down(api):
+    breaker = circuit.get(api)
+    return breaker is not None and breaker.state != circuit.CLOSED
+
+search_cache = cache.TTLCache(ttl=SEARCH_CACHE_TTL, maxsize=SEARCH_CACHE_SIZE)
+script_details = cache.TTLCache(ttl=SCRIPT_DETAIL_TTL, maxsize=2000)
+# every page of a creator's scripts, by lowercased username
+user_scripts = cache.TTLCache(ttl=SEARCH_CACHE_TTL, maxsize=200)
+trending_cache = cache.SWRCache(fresh_ttl=TRENDING_FRESH_TTL, hard_ttl=TRENDING_HARD_TTL, store=persistent_cache, namespace="trending",
+                               encode=models.scripts_to_json, decode=models.scripts_from_json)
+executors_cache = cache.SWRCache(fresh_ttl=EXECUTORS_FRESH_TTL, hard_ttl=EXECUTORS_HARD_TTL, store=persistent_cache, namespace="executors")
+inflight = cache.SingleFlight()
+popular_queries = popular.PopularQueries()
+script_index = search_index.SearchIndex(max_docs=LOCAL_INDEX_MAX_DOCS)
+query_corrector = spelling.QueryCorrector()
+query_completer = autocomplete.Completer()
+game_index = games.GameIndex()
+
+def index_scripts(scripts):
+    script_index.add_many(scripts)
+    query_corrector.add_many(scripts)
+    query_completer.add_many(scripts)
+    game_index.add_many(scripts)
+
+# every provider gets the same caching, retries and metrics
+def add_source(provider):
+    instrumented = middleware.InstrumentedSource(provider)
+    retrying = middleware.RetryingSource(instrumented)
+    source = middleware.CachedSource(
+        middleware.IndexingSource(retrying, script_index, query_corrector, query_completer, game_index),
+        search_cache=search_cache, details=script_details, trending_cache=trending_cache,
+        inflight=inflight, store=persistent_cache, popular=popular_queries,
+        search_disk_ttl=DISK_SEARCH_TTL, detail_disk_ttl=DISK_SCRIPT_TTL, spawn=spawn,
+    )
+    source.instrumented = instrumented
+    source.retrying = retrying
+    if hasattr(provider, "lookup"):
+        provider.lookup = source.get
+    return sources.register(source)
+
+add_source(sources.ScriptBloxSource())
+add_source(sources.RScriptsSource())
+
+# "'scriptblox' or 'rscripts'" for help and error text
+def api_choices():
+    return " or ".join(f"'{name}'" for name in sources.names())
+
+def source_error(e):
+    if isinstance(e, sources.SourceError):
+        return str(e)
+    if isinstance(e, http_client.REQUEST_ERRORS):
+        return f"Something went wrong: {e}"
+    return f"Unexpected response format: {e}"
+
+async def fetch_scripts(api, query, mode, page, **filters):
     try:
-        if api == "scriptblox":
-            params = {"q": query, "mode": mode, "page": page}
-            if filters.get("verified") is not None:
-                params["verified"] = 1 if filters["verified"] else 0
-            if filters.get("patched") is not None:
-                params["patched"] = 1 if filters["patched"] else 0
-            if filters.get("key") is not None:
-                params["key"] = 1 if filters["key"] else 0
-            if filters.get("universal") is not None:
-                params["universal"] = 1 if filters["universal"] else 0
-            if filters.get("sortBy"):
-                params["sortBy"] = filters["sortBy"]
-            if filters.get("order"):
-                params["order"] = filters["order"]
-            if filters.get("strict") is not None:
-                params["strict"] = "true" if filters["strict"] else "false"
-            if filters.get("owner"):
-                params["owner"] = filters["owner"]
-            if filters.get("placeId"):
-                params["placeId"] = filters["placeId"]
-            
-            query_string = urllib.parse.urlencode(params)
-            url = f"https://scriptblox.com/api/script/search?{query_string}"
-            r = requests.get(url)
-            r.raise_for_status()
-            data = r.json()
-            if "result" in data and "scripts" in data["result"]:
-                scripts = data["result"]["scripts"]
-                total_pages = data["result"].get("totalPages", None)
-                return scripts, total_pages, None
-            else:
-                return None, None, f"Couldn't find any scripts matching '{query}'"
-        elif api == "rscripts":
-            not_paid = False if mode.lower() == "paid" else True
-            params = {"q": query, "page": page, "notPaid": not_paid}
-            if filters.get("noKeySystem") is not None:
-                params["noKeySystem"] = filters["noKeySystem"]
-            if filters.get("mobileOnly") is not None:
-                params["mobileOnly"] = filters["mobileOnly"]
-            if filters.get("verifiedOnly") is not None:
-                params["verifiedOnly"] = filters["verifiedOnly"]
-            if filters.get("unpatched") is not None:
-                params["unpatched"] = filters["unpatched"]
-            if filters.get("orderBy"):
-                params["orderBy"] = filters["orderBy"]
-            if filters.get("sort"):
-                params["sort"] = filters["sort"]
-            
-            query_string = urllib.parse.urlencode(params)
-            url = f"https://rscripts.net/api/v2/scripts?{query_string}"
-            r = requests.get(url)
-            r.raise_for_status()
-            data = r.json()
-            if "scripts" in data:
-                scripts = data["scripts"]
-                return scripts, None, None
-            else:
-                return None, None, f"Couldn't find any scripts matching '{query}'"
-    except requests.RequestException as e:
-        return None, None, f"Something went wrong: {e}"
-    except KeyError as ke:
-        return None, None, f"Unexpected response format: {ke}"
+        scripts, total_pages = await sources.get(api).search(query, mode, page, **filters)
+        if scripts and page == 1:
+            # only queries that find something are worth suggesting
+            query_completer.add_query(query)
+        return scripts, total_pages, None
+    except Exception as e:
+        return None, None, source_error(e)
 
-def fetch_scripts_from_api(api, endpoint, page=1, **params):
+# the filtered listing behind /fetch and /rscripts_fetch
+async def fetch_browse(api, mode, page, **filters):
     try:
-        if api == "scriptblox":
-            if page and page > 1:
-                params["page"] = page
-            query_string = urllib.parse.urlencode(params) if params else ""
-            url = f"https://scriptblox.com/api/script/{endpoint}"
-            if query_string:
-                url += f"?{query_string}"
-        elif api == "rscripts":
-            if page and page > 1:
-                params["page"] = page
-            query_string = urllib.parse.urlencode(params) if params else ""
-            url = f"https://rscripts.net/api/v2/{endpoint}"
-            if query_string:
-                url += f"?{query_string}"
-        
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
-        return data, None
-    except requests.RequestException as e:
-        return None, f"Something went wrong: {e}"
+        scripts, total_pages = await sources.get(api).browse(mode, page, **filters)
+        return scripts, total_pages, None
     except Exception as e:
-        return None, f"Unexpected response format: {e}"
-# ugly code right here yes 
-def fetch_trending(api):
+        return None, None, source_error(e)
+
+async def fetch_trending(api, progress=None):
     try:
-        if api == "scriptblox":
-            url = "https://scriptblox.com/api/script/trending"
-            r = requests.get(url)
-            r.raise_for_status()
-            data = r.json()
-            if "result" in data and "scripts" in data["result"]:
-                trending_scripts = data["result"]["scripts"]
-                full_scripts = []
-                for script_meta in trending_scripts:
-                    slug = script_meta.get("slug")
-                    if slug:
-                        try:
-                            script_url = f"https://scriptblox.com/api/script/{slug}"
-                            script_r = requests.get(script_url)
-                            script_r.raise_for_status()
-                            script_data = script_r.json()
-                            if "script" in script_data:
-                                full_scripts.append(script_data["script"])
-                        except:
-                            continue
-                return full_scripts, None
-            return None, "Nothing trending right now"
-        elif api == "rscripts":
-            url = "https://rscripts.net/api/v2/trending"
-            r = requests.get(url)
-            r.raise_for_status()
-            data = r.json()
-            if "success" in data:
-                scripts = []
-                for item in data["success"]:
-                    script_data = item.get("script", {})
-                    if script_data:
-                        script_data["views"] = item.get("views", 0)
-                        user_data = item.get("user", {})
-                        if user_data:
-                            script_data["user"] = user_data
-                        scripts.append(script_data)
-                return scripts, None
-            return None, "Nothing is trending right now"
-    except requests.RequestException as e:
-        return None, f"bad: something went wrong: {e}"
+        return await sources.get(api).trending(progress), None
     except Exception as e:
-        return None, f"bad response = format broke or something: {e}"
+        return None, source_error(e)
 
-def fetch_script_by_id(api, script_id):
+async def fetch_script_by_id(api, script_id):
     try:
-        if api == "scriptblox":
-            url = f"https://scriptblox.com/api/script/{script_id}"
-            r = requests.get(url)
-            r.raise_for_status()
-            data = r.json()
-            if "script" in data:
-                return data["script"], None
-            return None, f"Couldn't find script '{script_id}'"
-        elif api == "rscripts":
-            url = f"https://rscripts.net/api/v2/script?id={script_id}"
-            r = requests.get(url)
-            r.raise_for_status()
-            data = r.json()
-            if "script" in data and len(data["script"]) > 0:
-                return data["script"][0], None
-            return None, f"Couldn't find script '{script_id}'"
-    except requests.RequestException as e:
-        return None, f"Something went wrong: {e}"
+        return await sources.get(api).get(script_id), None
     except Exception as e:
-        return None, f"Unexpected response format: {e}"
+        return None, source_error(e)
+
+async def fetch_rscripts_by_username(username, page=1):
+    try:
+        scripts, total_pages = await sources.get("rscripts").by_user(username, page)
+        return scripts, total_pages, None
+    except Exception as e:
+        return None, None, source_error(e)
+
+# pages 2..total_pages of a creator's scripts, USER_PAGES_CONCURRENCY at a
+# time, yielded as (page, scripts, error) in whatever order they land
+async def fetch_rscripts_user_pages(username, total_pages):
+    semaphore = asyncio.Semaphore(USER_PAGES_CONCURRENCY)
 
-def fetch_executors():
+    async def fetch(page):
+        async with semaphore:
+            return (page,) + await fetch_rscripts_by_username(username, page)
+
+    tasks = [asyncio.ensure_future(fetch(page)) for page in range(2, min(total_pages, USER_PAGES_MAX) + 1)]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            page, scripts, _, error = await next_page
+            yield page, scripts, error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def fetch_executors():
+    return await executors_cache.get("executors", lambda: inflight.do(("executors",), fetch_executors_uncached))
+
+async def fetch_executors_uncached():
     try:
         url = "https://scriptblox.com/api/executor/list"
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await http_client.get_json(url, conditional=True)
         return data, None
-    except requests.RequestException as e:
+    except http_client.REQUEST_ERRORS as e:
         return None, f"bad = went wrong: {e}"
     except Exception as e:
         return None, f"something went wrong: response format: {e}"
@@ -234,230 +254,449 @@ def format_datetime(dt_str):
     return f"{ago} | {formatted}"
 
 def format_timestamps(script):
-    created = format_datetime(script.get("createdAt", ""))
-    updated = format_datetime(script.get("updatedAt", ""))
+    created = format_datetime(script.created_at)
+    updated = format_datetime(script.updated_at)
     return f"**Created At:** {created}\n**Updated At:** {updated}"
 
-def create_embed(script, page, total_items, api):
+def create_embed(script, position, total_items, api):
+    source = sources.get(script.source)
     embed = discord.Embed(color=0x206694)
-    if api == "scriptblox":
-        embed.title = f"[SB] {script.get('title', 'No Title')}"
-        game = script.get("game", {})
-        game_name = game.get("name", "Unknown Game")
-        game_id = game.get("gameId", "")
-        if game_id:
-            game_link = f"https://www.roblox.com/games/{game_id}"
+    if script.source == "scriptblox":
+        embed.title = f"[{source.short}] {script.title}"
+        if script.game_id:
+            game_link = f"https://www.roblox.com/games/{script.game_id}"
         else:
             game_link = "https://www.roblox.com"        
-        script_image = script.get("image", FALLBACK_IMAGE)
-        views = script.get("views", 0)
-        script_type = "Free" if script.get("scriptType", "free").lower() == "free" else "Paid"
-        verified_status = "✅ Verified" if script.get("verified", False) else "❌ Not Verified"
-        key_status = f"[Key Link]({script.get('keyLink', '')})" if script.get("key", False) else "✅ No Key"
-        patched_status = "❌ Patched" if script.get("isPatched", False) else "✅ Not Patched"
-        universal_status = "🌐 Universal" if script.get("isUniversal", False) else "Not Universal"
-        truncated_script = script.get("script", "No Script")
+        script_image = script.image or FALLBACK_IMAGE
+        script_type = "Paid" if script.paid else "Free"
+        verified_status = "✅ Verified" if script.verified else "❌ Not Verified"
+        key_status = f"[Key Link]({script.key_link})" if script.key else "✅ No Key"
+        patched_status = "❌ Patched" if script.patched else "✅ Not Patched"
+        universal_status = "🌐 Universal" if script.universal else "Not Universal"
+        truncated_script = script.body or "No Script"
         if len(truncated_script) > 400:
             truncated_script = truncated_script[:397] + "..."
-        embed.add_field(name="Game", value=f"[{game_name}]({game_link})", inline=True)
+        embed.add_field(name="Game", value=f"[{script.game_name}]({game_link})", inline=True)
         embed.add_field(name="Verified", value=verified_status, inline=True)
         embed.add_field(name="Type", value=script_type, inline=True)
         embed.add_field(name="Universal", value=universal_status, inline=True)
-        embed.add_field(name="Views", value=f"👁️ {views}", inline=True)
+        embed.add_field(name="Views", value=f"👁️ {script.views}", inline=True)
         embed.add_field(name="Key", value=key_status, inline=True)
         embed.add_field(name="Patched", value=patched_status, inline=True)
-        embed.add_field(name="Links", value=f"[Raw Script](https://rawscripts.net/raw/{script.get('slug','')}) - [Script Page](https://scriptblox.com/script/{script.get('slug','')})", inline=False)
+        embed.add_field(name="Links", value=f"[Raw Script]({source.raw_link(script)}) - [Script Page]({source.page_url(script)})", inline=False)
         embed.add_field(name="Script", value=f"```lua\n{truncated_script}\n```", inline=False)
         embed.add_field(name="Timestamps", value=format_timestamps(script), inline=False)
         if validators.url(script_image):
             embed.set_image(url=script_image)
         else:
             embed.set_image(url=FALLBACK_IMAGE)
-    elif api == "rscripts":
-        embed.title = f"[RS] {script.get('title', 'No Title')}"
-        views = script.get("views", 0)
-        likes = script.get("likes", 0)
-        dislikes = script.get("dislikes", 0)
-        date_str = script.get("lastUpdated") or script.get("createdAt", "")
-        date = format_datetime(date_str)
-        mobile_ready = "📱 Mobile Ready" if script.get("mobileReady", False) else "🚫 Not Mobile Ready"
-        user = script.get("user", {})
-        verified_status = "✅ Verified" if user.get("verified", False) else "❌ Not Verified"
-        paid_status = "💲 Paid" if script.get("paid", False) else "🆓 Free"
-        raw_script = script.get("rawScript", "")
-        script_text = f"```lua\nloadstring(game:HttpGet(\"{raw_script}\"))()\n```" if raw_script else "⚠️ No script content."
-        user_name = user.get("username", "Unknown")
-        user_avatar_url = user.get("image", FALLBACK_IMAGE)
-        embed.add_field(name="Views", value=f"👁️ {views}", inline=True)
-        embed.add_field(name="Likes", value=f"👍 {likes}", inline=True)
-        embed.add_field(name="Dislikes", value=f"👎 {dislikes}", inline=True)
+    else:
+        embed.title = f"[{source.short}] {script.title}"
+        date = format_datetime(script.updated_at or script.created_at)
+        mobile_ready = "📱 Mobile Ready" if script.mobile_ready else "🚫 Not Mobile Ready"
+        verified_status = "✅ Verified" if script.verified else "❌ Not Verified"
+        paid_status = "💲 Paid" if script.paid else "🆓 Free"
+        copy_text = source.copy_text(script)
+        script_text = f"```lua\n{copy_text}\n```" if copy_text else "⚠️ No script content."
+        embed.add_field(name="Views", value=f"👁️ {script.views}", inline=True)
+        embed.add_field(name="Likes", value=f"👍 {script.likes}", inline=True)
+        embed.add_field(name="Dislikes", value=f"👎 {script.dislikes}", inline=True)
         embed.add_field(name="Mobile", value=mobile_ready, inline=True)
         embed.add_field(name="Verified", value=verified_status, inline=True)
         embed.add_field(name="Cost", value=paid_status, inline=True)
         embed.add_field(name="Script", value=script_text, inline=False)
-        embed.add_field(name="Links", value=f"[Script Page](https://rscripts.net/script/{script.get('slug','')})", inline=False)
+        embed.add_field(name="Links", value=f"[Script Page]({source.page_url(script)})", inline=False)
         embed.add_field(name="Date", value=date, inline=True)
-        embed.set_author(name=user_name, icon_url=user_avatar_url)
-        image_url = script.get("image")
-        if validators.url(image_url):
-            embed.set_image(url=image_url)
+        embed.set_author(name=script.owner, icon_url=script.owner_avatar or FALLBACK_IMAGE)
+        if validators.url(script.image):
+            embed.set_image(url=script.image)
         else:
             embed.set_image(url=FALLBACK_IMAGE)
-    embed.set_footer(text=f"Made by AdvanceFalling Team | Powered by {'ScriptBlox' if api=='scriptblox' else 'RScripts'} | Page {page}/{total_items}")
+    embed.set_footer(text=f"Made by AdvanceFalling Team | Powered by {source.label} | Item {position} of {total_items}")
     return embed
 
+def search_local(query, mode, api=None):
+    paid = (mode or "free").lower() == "paid"
+    return [script for _, script in script_index.search(query, limit=LOCAL_SEARCH_LIMIT, source=api, paid=paid)]
+
+# the query is searched as typed first; a spelling correction only replaces
+# it when that finds nothing. Results are cached, so the real search after
+# this doesn't go upstream again. All Sources decides in
+# display_scripts_federated instead, so it never waits on the slowest site.
+async def correction_if_empty(api, query, mode, **filters):
+    corrected = query_corrector.correct(query)
+    if not corrected or corrected == query.lower():
+        return None
+    if api == "local":
+        found = search_local(query, mode)
+    else:
+        found, _, error = await fetch_scripts(api, query, mode, 1, **filters)
+        if error:
+            return None
+    return None if found else corrected
+
+# answers from the local index when upstream can't; False if it has nothing either
+async def display_local_fallback(interaction, message, query, mode, api, error):
+    scripts = search_local(query, mode, None if api == "all" else api)
+    if not scripts:
+        return False
+    await interaction.followup.send(f"⚠️ {error}\nShowing matches from scripts the bot has already seen instead.", ephemeral=True)
+    await display_scripts_local(interaction, message, scripts, api=api)
+    return True
+
 async def display_scripts_dynamic(interaction, message, query, mode, api, **filters):
-    current_page = 1
-    while True:
-        scripts, total_pages, error = fetch_scripts(api, query, mode, current_page, **filters)
+    # pages holds every upstream page fetched so far; the buttons move an item
+    # cursor across them and only go upstream when it crosses a page boundary
+    pages = {}
+    page_size = None
+    total_pages = None
+    last_page = None
+    index = 0
+    prefetcher = prefetch.Prefetcher(lambda page_num: fetch_scripts(api, query, mode, page_num, **filters))
+
+    async def load_page(page_num):
+        nonlocal page_size, total_pages, last_page
+        if page_num in pages:
+            return None
+        scripts, total, error = await prefetcher.get(page_num)
         if error:
+            return error
+        scripts = scripts or []
+        pages[page_num] = scripts
+        if total is not None:
+            total_pages = total
+            if last_page is None:
+                last_page = total
+        if page_size is None:
+            page_size = len(scripts)
+        if not scripts or (page_size and len(scripts) < page_size):
+            last_page = page_num if scripts else page_num - 1
+        return None
+
+    # totalPages can overstate: an empty last page moves last_page back, so
+    # keep going until the page it points at is loaded
+    async def load_last():
+        while last_page not in pages:
+            error = await load_page(last_page)
+            if error:
+                return error
+        return None
+
+    def locate(i):
+        return i // page_size + 1, i % page_size
+
+    def total_items():
+        if last_page is not None and last_page in pages:
+            return (last_page - 1) * page_size + len(pages[last_page])
+        return None
+
+    def has_next():
+        total = total_items()
+        if total is not None:
+            return index + 1 < total
+        return last_page is None or locate(index + 1)[0] <= last_page
+
+    error = await load_page(1)
+    if error:
+        if not await display_local_fallback(interaction, message, query, mode, api, error):
             await interaction.followup.send(error)
-            break
-        if not scripts:
-            await interaction.followup.send("No scripts found.")
-            break
-        script = scripts[0]
-        display_total = total_pages if total_pages is not None else "Unknown"
-        embed = create_embed(script, current_page, display_total, api)
-        view = discord.ui.View(timeout=60)
-        if total_pages is None:
-            if current_page > 1:
-                view.add_item(discord.ui.Button(label="◀️", style=discord.ButtonStyle.primary, custom_id="previous", row=0))
-            view.add_item(discord.ui.Button(label=f"Page {current_page}/?", style=discord.ButtonStyle.secondary, disabled=True, row=0))
-            view.add_item(discord.ui.Button(label="▶️", style=discord.ButtonStyle.primary, custom_id="next", row=0))
-        else:
-            if current_page > 1:
+        return
+    if not pages[1]:
+        await interaction.followup.send("No scripts found.")
+        return
+
+    try:
+        while True:
+            page_num, offset = locate(index)
+            script = pages[page_num][offset]
+            total = total_items()
+            if total is not None:
+                display_total = total
+            elif total_pages is not None:
+                display_total = f"~{total_pages * page_size}"
+            else:
+                display_total = "?"
+            embed = create_embed(script, index + 1, display_total, api)
+            view = discord.ui.View(timeout=60)
+            if index > 0:
                 view.add_item(discord.ui.Button(label="⏪", style=discord.ButtonStyle.primary, custom_id="first", row=0))
                 view.add_item(discord.ui.Button(label="◀️", style=discord.ButtonStyle.primary, custom_id="previous", row=0))
-            view.add_item(discord.ui.Button(label=f"Page {current_page}/{display_total}", style=discord.ButtonStyle.secondary, disabled=True, row=0))
-            if current_page < total_pages:
+            view.add_item(discord.ui.Button(label=f"Item {index + 1}/{display_total}", style=discord.ButtonStyle.secondary, disabled=True, row=0))
+            if has_next():
                 view.add_item(discord.ui.Button(label="▶️", style=discord.ButtonStyle.primary, custom_id="next", row=0))
-                view.add_item(discord.ui.Button(label="⏩", style=discord.ButtonStyle.primary, custom_id="last", row=0))
-        if api == "scriptblox":
-            post_url = f"https://scriptblox.com/script/{script.get('slug','')}"
-            raw_url = f"https://rawscripts.net/raw/{script.get('slug','')}"
-            download_url = f"https://scriptblox.com/download/{script.get('_id','')}"
+                if last_page is not None:
+                    view.add_item(discord.ui.Button(label="⏩", style=discord.ButtonStyle.primary, custom_id="last", row=0))
+            source = sources.get(script.source)
+            view.add_item(discord.ui.Button(label="View", url=source.page_url(script), style=discord.ButtonStyle.link, row=1))
+            view.add_item(discord.ui.Button(label="Raw", url=source.raw_link(script), style=discord.ButtonStyle.link, row=1))
+            view.add_item(discord.ui.Button(label="Download", url=source.download_url(script), style=discord.ButtonStyle.link, row=1))
+            copy_button = discord.ui.Button(label="Copy", style=discord.ButtonStyle.primary, row=1)
+            async def copy_callback(btn_interaction, script=script, source=source):
+                content = f"```lua\n{source.copy_text(script)}\n```"
+                if script.body_truncated:
+                    content += f"\nScript is too long to paste here, get the rest from [Raw]({source.raw_link(script)})"
+                await btn_interaction.response.send_message(content, ephemeral=True)
+            copy_button.callback = copy_callback
+            view.add_item(copy_button)
+            await message.edit(embed=embed, view=view)
+            next_page = page_num + 1
+            if next_page not in pages and (last_page is None or next_page <= last_page):
+                prefetcher.prefetch(next_page)
+            def check(i: discord.Interaction):
+                return i.user == interaction.user and i.message.id == message.id
+            try:
+                i: discord.Interaction = await bot.wait_for("interaction", check=check, timeout=30.0)
+                cid = i.data.get("custom_id")
+                await i.response.defer()
+                target = index
+                if cid == "previous" and index > 0:
+                    target = index - 1
+                elif cid == "next" and has_next():
+                    target = index + 1
+                elif cid == "last" and last_page is not None:
+                    error = await load_last()
+                    if error:
+                        await interaction.followup.send(error)
+                        continue
+                    target = total_items() - 1
+                elif cid == "first":
+                    target = 0
+                target_page, target_offset = locate(target)
+                error = await load_page(target_page)
+                if error:
+                    await interaction.followup.send(error)
+                    continue
+                if target_offset < len(pages[target_page]):
+                    index = target
+            except asyncio.TimeoutError:
+                await message.edit(content="Interaction timed out.", view=None)
+                break
+    finally:
+        prefetcher.cancel()
+
+# mirrors[i] is how many reuploads of scripts[i] were collapsed into it
+def create_list_embed(scripts, api, page_num, total_pages, more="", description=None, mirrors=None):
+    if api == "all":
+        title = "🌐 All Sources"
+    else:
+        source = sources.get(api)
+        title = f"{source.icon} {source.label} Scripts"
+    if description is None:
+        description = f"Showing {len(scripts)} script{'s' if len(scripts) != 1 else ''}"
+        hidden = sum(mirrors or ())
+        if hidden:
+            description += f" ({hidden} mirror{'s' if hidden != 1 else ''} hidden)"
+    embed = discord.Embed(
+        title=title,
+        description=description,
+        color=0x206694
+    )
+    
+    start = page_num * SCRIPTS_PER_PAGE
+    end = min(start + SCRIPTS_PER_PAGE, len(scripts))
+    
+    for idx, script in enumerate(scripts[start:end], start=start+1):
+        verified = "✅" if script.verified else "❌"
+        source = sources.get(script.source)
+        if script.source == "scriptblox":
+            patched = "❌" if script.patched else "✅"
+            
+            value = f"**Game:** {script.game_name}\n"
+            value += f"**Verified:** {verified} | **Patched:** {patched}\n"
+            value += f"**Views:** 👁️ {script.views}\n"
+            value += f"[View]({source.page_url(script)}) | [Raw]({source.raw_link(script)})"
         else:
-            post_url = f"https://rscripts.net/script/{script.get('slug','')}"
-            raw_url = script.get("rawScript", "")
-            download_url = raw_url
-        view.add_item(discord.ui.Button(label="View", url=post_url, style=discord.ButtonStyle.link, row=1))
-        view.add_item(discord.ui.Button(label="Raw", url=raw_url, style=discord.ButtonStyle.link, row=1))
-        view.add_item(discord.ui.Button(label="Download", url=download_url, style=discord.ButtonStyle.link, row=1))
-        copy_button = discord.ui.Button(label="Copy", style=discord.ButtonStyle.primary, row=1)
-        async def copy_callback(btn_interaction):
-            if api == "scriptblox":
-                content = script.get("script", "")
-            else:
-                raw_url_local = script.get("rawScript", "")
-                content = f'loadstring(game:HttpGet("{raw_url_local}"))()'
-            await btn_interaction.response.send_message(f"```lua\n{content}\n```", ephemeral=True)
-        copy_button.callback = copy_callback
-        view.add_item(copy_button)
-        await message.edit(embed=embed, view=view)
-        def check(i: discord.Interaction):
-            return i.user == interaction.user and i.message.id == message.id
-        try:
-            i: discord.Interaction = await bot.wait_for("interaction", check=check, timeout=30.0)
-            cid = i.data.get("custom_id")
-            if cid == "previous" and current_page > 1:
-                current_page -= 1
-            elif cid == "next" and (total_pages is None or current_page < total_pages):
-                current_page += 1
-            elif cid == "last" and total_pages is not None:
-                current_page = total_pages
-            elif cid == "first":
-                current_page = 1
-            await i.response.defer()
-        except asyncio.TimeoutError:
-            await message.edit(content="Interaction timed out.", view=None)
-            break
+            value = f"**Views:** 👁️ {script.views} | **Likes:** 👍 {script.likes}\n"
+            value += f"**Verified:** {verified}\n"
+            value += f"[View]({source.page_url(script)})"
+        
+        name = f"{idx}. {script.title}"
+        if api == "all":
+            name = f"{idx}. [{sources.get(script.source).short}] {script.title}"
+        if mirrors and mirrors[idx - 1]:
+            name += f" (+{mirrors[idx - 1]} mirror{'s' if mirrors[idx - 1] != 1 else ''})"
+        embed.add_field(name=name, value=value, inline=False)
+    
+    embed.set_footer(text=f"Made by AdvanceFalling Team | Page {page_num + 1}/{total_pages}{more}")
+    return embed
 
-async def display_scripts_local(interaction, message, scripts, api):
+# fetch_page(page_num) -> (scripts, error) lets the list grow from upstream
+# pages past the first one, with the next page prefetched in the background.
+# pending is an async iterator of script batches that arrive after the first
+# render (slower sources in an all-sources search); they're added to the list,
+# re-sorted with rank if given, and the message is redrawn. Reuploads of the
+# same script are collapsed into the first (best ranked) copy.
+async def display_scripts_local(interaction, message, scripts, api, fetch_page=None, pending=None, rank=None):
     if not scripts:
         await interaction.followup.send("No scripts found.")
         return
     
-    scripts_per_page = 5
+    found = list(scripts)
+    scripts, mirrors = dedupe.collapse(found)
+    scripts_per_page = SCRIPTS_PER_PAGE
     page = 0
     total_pages = (len(scripts) - 1) // scripts_per_page + 1
+    upstream_page = 1
+    exhausted = fetch_page is None
+    prefetcher = None
+    if not exhausted:
+        prefetcher = prefetch.Prefetcher(fetch_page)
+        prefetcher.prefetch(upstream_page + 1)
+
+    def regroup():
+        nonlocal scripts, mirrors, total_pages, page
+        scripts, mirrors = dedupe.collapse(found)
+        total_pages = (len(scripts) - 1) // scripts_per_page + 1
+        # a new script can link two groups, so the list may also shrink
+        page = min(page, total_pages - 1)
+
+    async def load_more():
+        nonlocal upstream_page, exhausted
+        more, error = await prefetcher.get(upstream_page + 1)
+        if error or not more:
+            exhausted = True
+            return
+        found.extend(more)
+        regroup()
+        upstream_page += 1
+        prefetcher.prefetch(upstream_page + 1)
     
-    def create_multi_script_embed(page_num):
-        embed = discord.Embed(
-            title=f"{'📊 ScriptBlox' if api == 'scriptblox' else '📜 RScripts'} Scripts",
-            description=f"Showing {len(scripts)} script{'s' if len(scripts) != 1 else ''}",
-            color=0x206694
-        )
-        
-        start = page_num * scripts_per_page
-        end = min(start + scripts_per_page, len(scripts))
-        
-        for idx, script in enumerate(scripts[start:end], start=start+1):
-            if api == "scriptblox":
-                title = script.get("title", "No Title")
-                game = script.get("game", {}).get("name", "Unknown Game")
-                verified = "✅" if script.get("verified", False) else "❌"
-                patched = "❌" if script.get("isPatched", False) else "✅"
-                views = script.get("views", 0)
-                slug = script.get("slug", "")
-                
-                value = f"**Game:** {game}\n"
-                value += f"**Verified:** {verified} | **Patched:** {patched}\n"
-                value += f"**Views:** 👁️ {views}\n"
-                value += f"[View](https://scriptblox.com/script/{slug}) | [Raw](https://rawscripts.net/raw/{slug})"
-                
-                embed.add_field(name=f"{idx}. {title}", value=value, inline=False)
-            else:
-                title = script.get("title", "No Title")
-                views = script.get("views", 0)
-                likes = script.get("likes", 0)
-                verified = "✅" if script.get("user", {}).get("verified", False) else "❌"
-                slug = script.get("slug", "")
-                
-                value = f"**Views:** 👁️ {views} | **Likes:** 👍 {likes}\n"
-                value += f"**Verified:** {verified}\n"
-                value += f"[View](https://rscripts.net/script/{slug})"
-                
-                embed.add_field(name=f"{idx}. {title}", value=value, inline=False)
-        
-        embed.set_footer(text=f"Made by AdvanceFalling Team | Page {page_num + 1}/{total_pages}")
-        return embed
-    
-    while True:
-        embed = create_multi_script_embed(page)
+    async def render():
+        embed = create_list_embed(scripts, api, page, total_pages, "" if exhausted else "+", mirrors=mirrors)
         view = discord.ui.View(timeout=60)
         
-        if total_pages > 1:
+        if total_pages > 1 or not exhausted:
+            more = "" if exhausted else "+"
             if page > 0:
                 view.add_item(discord.ui.Button(label="⏪", style=discord.ButtonStyle.primary, custom_id="first", row=0))
                 view.add_item(discord.ui.Button(label="◀️", style=discord.ButtonStyle.primary, custom_id="previous", row=0))
-            view.add_item(discord.ui.Button(label=f"Page {page + 1}/{total_pages}", style=discord.ButtonStyle.secondary, disabled=True, row=0))
-            if page < total_pages - 1:
+            view.add_item(discord.ui.Button(label=f"Page {page + 1}/{total_pages}{more}", style=discord.ButtonStyle.secondary, disabled=True, row=0))
+            if page < total_pages - 1 or not exhausted:
                 view.add_item(discord.ui.Button(label="▶️", style=discord.ButtonStyle.primary, custom_id="next", row=0))
+            if page < total_pages - 1:
                 view.add_item(discord.ui.Button(label="⏩", style=discord.ButtonStyle.primary, custom_id="last", row=0))
         
         await message.edit(embed=embed, view=view)
-        
-        def check(i):
-            return i.user == interaction.user and i.message.id == message.id
-        
-        try:
-            i = await bot.wait_for("interaction", check=check, timeout=30.0)
-            cid = i.data.get("custom_id")
+    
+    redraw = progressive.ProgressiveEdit(render)
+    async def merge_pending():
+        async for batch in pending:
+            found.extend(batch)
+            if rank:
+                found[:] = rank(found)
+            regroup()
+            redraw.update()
+    
+    merger = asyncio.ensure_future(merge_pending()) if pending is not None else None
+    try:
+        while True:
+            await render()
             
-            if cid == "previous" and page > 0:
-                page -= 1
-            elif cid == "next" and page < total_pages - 1:
-                page += 1
-            elif cid == "last":
-                page = total_pages - 1
-            elif cid == "first":
-                page = 0
+            def check(i):
+                return i.user == interaction.user and i.message.id == message.id
             
-            await i.response.defer()
-        except asyncio.TimeoutError:
-            await message.edit(content="Interaction timed out.", view=None)
+            try:
+                i = await bot.wait_for("interaction", check=check, timeout=30.0)
+                cid = i.data.get("custom_id")
+                await i.response.defer()
+                
+                if cid == "next" and page == total_pages - 1 and not exhausted:
+                    await load_more()
+                
+                if cid == "previous" and page > 0:
+                    page -= 1
+                elif cid == "next" and page < total_pages - 1:
+                    page += 1
+                elif cid == "last":
+                    page = total_pages - 1
+                elif cid == "first":
+                    page = 0
+            except asyncio.TimeoutError:
+                await redraw.done()
+                await message.edit(content="Interaction timed out.", view=None)
+                break
+    finally:
+        if prefetcher:
+            prefetcher.cancel()
+        if merger:
+            merger.cancel()
+            await asyncio.gather(merger, return_exceptions=True)
+        await redraw.done()
+
+# whichever source answers first is shown right away; the others are merged
+# into the ranked list when they arrive
+async def display_scripts_federated(interaction, message, query, mode, try_correction=True, **filters):
+    # the first answer goes straight to the full display, so this one only
+    # times it
+    first_render = progressive.ProgressiveEdit(None, "search:all")
+    results = federated.search_all(query, mode, 1, **filters)
+    first = None
+    failed = []
+    async for name, scripts, _, error in results:
+        if error is not None:
+            failed.append((sources.get(name).label, source_error(error)))
+        elif scripts:
+            first = scripts
+            query_completer.add_query(query)
             break
+    if first is None:
+        await results.aclose()
+        # every site that answered found nothing: maybe it's a typo
+        corrected = query_corrector.correct(query) if try_correction and len(failed) < len(sources.names()) else None
+        if corrected and corrected != query.lower():
+            await interaction.followup.send(f"🔤 Nothing found for '{query}', searching for **{corrected}** instead.")
+            await display_scripts_federated(interaction, message, corrected, mode, try_correction=False, **filters)
+            return
+        errors = [f"{label}: {reason}" for label, reason in failed]
+        if errors:
+            if not await display_local_fallback(interaction, message, query, mode, "all", "\n".join(errors)):
+                await interaction.followup.send("\n".join(errors))
+        else:
+            await interaction.followup.send("No scripts found.")
+        return
+
+    # sources that failed before the first answer are missing from the list too
+    for label, reason in failed:
+        await interaction.followup.send(f"⚠️ {label} didn't answer: {reason}", ephemeral=True)
+
+    async def later():
+        async for name, scripts, _, error in results:
+            if error is not None:
+                await interaction.followup.send(f"⚠️ {sources.get(name).label} didn't answer: {source_error(error)}", ephemeral=True)
+            elif scripts:
+                yield scripts
+
+    async def fetch_page(page_num):
+        more, page_errors = await federated.search_all_merged(query, mode, page_num, **filters)
+        if not more and page_errors:
+            return None, source_error(page_errors[0])
+        return more, None
+
+    await first_render.done()
+    try:
+        await display_scripts_local(interaction, message, federated.rank(first), api="all",
+                                    fetch_page=fetch_page, pending=later(), rank=federated.rank)
+    finally:
+        await results.aclose()
+
+def build_warmer():
+    cache_warmer = warmer.CacheWarmer()
+    for api in sources.names():
+        async def warm_trending(api=api):
+            if not upstream_down(api):
+                await sources.get(api).refresh_trending()
+        cache_warmer.add_job(f"trending:{api}", TRENDING_FRESH_TTL * 0.8, warm_trending)
+    async def warm_executors():
+        if not upstream_down("scriptblox"):
+            await executors_cache.refresh("executors", lambda: inflight.do(("executors",), fetch_executors_uncached))
+    cache_warmer.add_job("executors", EXECUTORS_FRESH_TTL * 0.8, warm_executors)
+    async def warm_top_queries():
+        for _, (api, query, mode, filters), _ in popular_queries.top(WARM_TOP_QUERIES):
+            if not upstream_down(api):
+                await sources.get(api).refresh_search(query, mode, 1, **filters)
+    cache_warmer.add_job("top queries", SEARCH_CACHE_TTL * 0.8, warm_top_queries)
+    cache_warmer.add_job("disk vacuum", DISK_VACUUM_INTERVAL, persistent_cache.vacuum)
+    return cache_warmer
 
 async def send_help(destination):
     embed = discord.Embed(
@@ -527,6 +766,95 @@ async def prefix_help(ctx):
 async def slash_help(interaction: discord.Interaction):
     await send_help(interaction)
 
+# discord caps messages at 2000 characters
+async def send_lines(destination, lines, limit=2000):
+    chunk = ""
+    for line in lines:
+        if chunk and len(chunk) + len(line) + 1 > limit:
+            await destination.send(chunk)
+            chunk = ""
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        await destination.send(chunk)
+
+@bot.command(name='cachestats')
+@commands.is_owner()
+async def prefix_cachestats(ctx):
+    lines = []
+    for name, c in (("search", search_cache), ("script details", script_details), ("fingerprints", dedupe.fingerprints)):
+        st = c.stats()
+        lines.append(f"**{name}**: {st['size']}/{st['maxsize']} entries | ttl {st['ttl']}s | "
+                     f"hits {st['hits']} | misses {st['misses']} | evictions {st['evictions']} | "
+                     f"expired {st['expirations']} | hit rate {st['hit_rate']:.0%}")
+    for name, c in (("trending", trending_cache), ("executors", executors_cache)):
+        st = c.stats()
+        lines.append(f"**{name}**: fresh {st['fresh_ttl']}s / hard {st['hard_ttl']}s | fresh hits {st['fresh_hits']} | "
+                     f"stale hits {st['stale_hits']} | misses {st['misses']} | refreshes {st['refreshes']} "
+                     f"({st['refresh_failures']} failed)")
+    st = await persistent_cache.stats()
+    if st["enabled"]:
+        lines.append(f"**disk**: {st['entries']} entries | {st['bytes'] / 1048576:.1f}/{st['max_bytes'] / 1048576:.0f} MB | "
+                     f"hits {st['hits']} | misses {st['misses']} | writes {st['writes']} | evicted {st['evictions']}")
+    if bot.warmer:
+        for job, st in bot.warmer.stats.items():
+            lines.append(f"**warm {job}**: {st['runs']} runs | {st['failures']} failed | {st['skipped']} skipped (busy)")
+    if bot.crawler:
+        lines += bot.crawler.report()
+    for endpoint, st in sorted(http_client.endpoint_stats().items()):
+        ratio = st["not_modified"] / st["requests"] if st["requests"] else 0.0
+        lines.append(f"**{endpoint}**: {st['requests']} requests | {st['bytes'] / 1024:.0f} KB | 304s {ratio:.0%}")
+    st = inflight.stats()
+    lines.append(f"**in-flight**: {st['in_flight']} running | {st['started']} started | {st['coalesced']} coalesced")
+    for host, st in ratelimit.all_stats().items():
+        lines.append(f"**{host}**: {st['rate']}/s burst {st['capacity']} | queued {st['queue_depth']} | "
+                     f"avg wait {st['avg_wait']:.2f}s | max wait {st['max_wait']:.2f}s | 429s {st['throttled']} | "
+                     f"paused {st['paused_for']:.0f}s")
+    for source in sources.all_sources():
+        for method, st in source.instrumented.stats.items():
+            avg = st["total_time"] / st["calls"] if st["calls"] else 0.0
+            lines.append(f"**{source.name}.{method}**: {st['calls']} calls | {st['errors']} errors | "
+                         f"avg {avg:.2f}s | max {st['max_time']:.2f}s")
+        lines.append(f"**{source.name} retries**: {source.retrying.retries}")
+    for name, st in progressive.summary().items():
+        lines.append(f"**first result {name}**: avg {st['avg_ttfr']:.2f}s | max {st['max_ttfr']:.2f}s over {st['runs']} | "
+                     f"{st['edits']} partial edits | {st['coalesced']} coalesced")
+    st = script_index.stats()
+    lines.append(f"**local index**: {st['documents']}/{st['max_docs']} scripts | {st['terms']} terms | "
+                 f"{st['tombstones']} tombstones | {st['evicted']} evicted | {st['queries']} queries")
+    st = query_corrector.stats()
+    lines.append(f"**did you mean**: {st['words']} words | {st['phrases']} game names | "
+                 f"{st['corrections']}/{st['lookups']} queries corrected")
+    st = query_completer.stats()
+    lines.append(f"**autocomplete**: {st['entries']} suggestions | {st['lookups']} lookups")
+    st = game_index.stats()
+    lines.append(f"**games**: {st['games']} names | {st['place_ids']} place ids | {st['lookups']} lookups")
+    st = pagination.stats
+    lines.append(f"**fill to max_results**: {st['filled']}/{st['runs']} filled | {st['pages']} pages | "
+                 f"{st['dropped']} dropped by filters")
+    st = prefetch.stats
+    lines.append(f"**prefetch**: {st['issued']} issued | {st['hits']} ready | {st['waited']} in flight | "
+                 f"{st['misses']} missed | {st['wasted']} unused | hit rate {prefetch.hit_rate():.0%}")
+    await send_lines(ctx, lines)
+
+@bot.command(name='breakers')
+@commands.is_owner()
+async def prefix_breakers(ctx, action: str = None, name: str = None):
+    if action == "reset":
+        breaker = circuit.get(name)
+        if breaker is None:
+            await ctx.send(f"❌ Unknown upstream. Choose one of: {', '.join(circuit.all_status())}")
+            return
+        breaker.reset()
+    lines = []
+    for upstream, st in circuit.all_status().items():
+        line = f"**{upstream}**: {st['state']} | failures {st['failures']} | opened {st['times_opened']}x | rejected {st['rejected']}"
+        if st["state"] == circuit.OPEN:
+            line += f" | probe in {st['retry_in']:.0f}s"
+        if st["last_error"]:
+            line += f"\n└ last error: {st['last_error'][:150]}"
+        lines.append(line)
+    await send_lines(ctx, lines)
+
 @bot.command(name='search')
 async def prefix_search(ctx, query: str = None, mode: str = 'free'):
     if query:
@@ -542,10 +870,18 @@ class APISelect(discord.ui.Select):
         options = [
             discord.SelectOption(label="ScriptBlox", value="scriptblox", description="Search scripts from ScriptBlox API"),
             discord.SelectOption(label="Rscripts", value="rscripts", description="Search scripts from RScripts API"),
+            discord.SelectOption(label="All Sources", value="all", description="Search every site at once, best results first"),
+            discord.SelectOption(label="Seen Scripts", value="local", description="Instant search over scripts the bot has already fetched"),
         ]
         super().__init__(placeholder="Choose the API to search scripts...", min_values=1, max_values=1, options=options)
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
+        corrected = None
+        if self.values[0] != "all":
+            corrected = await correction_if_empty(self.values[0], self.query, self.mode, **self.filters)
+        if corrected:
+            await interaction.followup.send(f"🔤 Nothing found for '{self.query}', searching for **{corrected}** instead.")
+            self.query = corrected
         if self.values[0] == "scriptblox":
             await interaction.followup.send("Searching ScriptBlox API...")
             temp_msg = await interaction.followup.send("Fetching data...", ephemeral=True)
@@ -553,11 +889,26 @@ class APISelect(discord.ui.Select):
         elif self.values[0] == "rscripts":
             await interaction.followup.send("Searching RScripts API...")
             temp_msg = await interaction.followup.send("Fetching data...", ephemeral=True)
-            scripts, _, error = fetch_scripts("rscripts", self.query, self.mode, 1, **self.filters)
+            scripts, _, error = await fetch_scripts("rscripts", self.query, self.mode, 1, **self.filters)
             if error:
-                await interaction.followup.send(error)
+                if not await display_local_fallback(interaction, temp_msg, self.query, self.mode, "rscripts", error):
+                    await interaction.followup.send(error)
                 return
-            await display_scripts_local(interaction, temp_msg, scripts, api="rscripts")
+            async def fetch_page(page_num):
+                more, _, error = await fetch_scripts("rscripts", self.query, self.mode, page_num, **self.filters)
+                return more, error
+            await display_scripts_local(interaction, temp_msg, scripts, api="rscripts", fetch_page=fetch_page)
+        elif self.values[0] == "all":
+            await interaction.followup.send("Searching all sources...")
+            temp_msg = await interaction.followup.send("Fetching data...", ephemeral=True)
+            await display_scripts_federated(interaction, temp_msg, self.query, self.mode, **self.filters)
+        elif self.values[0] == "local":
+            start = time.perf_counter()
+            scripts = search_local(self.query, self.mode)
+            elapsed = (time.perf_counter() - start) * 1000
+            await interaction.followup.send(f"Searching scripts the bot has already seen... ({len(scripts)} found in {elapsed:.1f} ms)")
+            temp_msg = await interaction.followup.send("Fetching data...", ephemeral=True)
+            await display_scripts_local(interaction, temp_msg, scripts, api="all")
 
 class APISearchView(discord.ui.View):
     def __init__(self, query, mode, filters=None):
@@ -616,6 +967,16 @@ async def slash_search(
     
     await interaction.response.send_message("Select the API to search scripts from:", view=APISearchView(query, mode, filters))
 
+# served from memory only, Discord gives up on autocomplete after 3 seconds
+@slash_search.autocomplete("query")
+async def slash_search_query_autocomplete(interaction: discord.Interaction, current: str):
+    suggestions = query_completer.complete(current)
+    if not suggestions and current:
+        corrected = query_corrector.correct(current)
+        if corrected:
+            suggestions = query_completer.complete(corrected) or [corrected]
+    return [app_commands.Choice(name=text[:autocomplete.MAX_CHOICE_LENGTH], value=text[:autocomplete.MAX_CHOICE_LENGTH]) for text in suggestions]
+
 @bot.tree.command(name="fetch", description="Fetch scripts from ScriptBlox with advanced filters")
 @app_commands.describe(
     mode="Script mode (free or paid)",
@@ -626,7 +987,7 @@ async def slash_search(
     sort_by="Sort by (views, likeCount, createdAt, updatedAt, dislikeCount)",
     sort_order="Sort order (asc or desc)",
     owner="Filter by owner username",
-    place_id="Filter by game place ID",
+    place_id="Filter by game, type its name or place ID",
     max_results="Maximum results per page (1-20)"
 )
 async def slash_fetch(
@@ -643,71 +1004,84 @@ async def slash_fetch(
     max_results: int = 20
 ):
     await interaction.response.defer()
-    params = {"mode": mode, "max": max_results}
-    if verified is not None:
-        params["verified"] = 1 if verified else 0
-    if patched is not None:
-        params["patched"] = 1 if patched else 0
-    if key_system is not None:
-        params["key"] = 1 if key_system else 0
-    if universal is not None:
-        params["universal"] = 1 if universal else 0
-    if sort_by:
-        params["sortBy"] = sort_by
-    if sort_order:
-        params["order"] = sort_order
-    if owner:
-        params["owner"] = owner
-    if place_id:
-        params["placeId"] = place_id
+    if place_id and not place_id.strip().isdigit():
+        # typed a name without picking a suggestion
+        resolved = game_index.resolve(place_id)
+        if resolved is None:
+            await interaction.followup.send(f"❌ Don't know the place ID for '{place_id}' yet, pick one of the suggestions or paste the number.")
+            return
+        place_id = resolved
+    filters = {"verified": verified, "patched": patched, "key": key_system, "universal": universal,
+               "sortBy": sort_by, "order": sort_order, "owner": owner, "placeId": place_id, "max": max_results}
     
-    data, error = fetch_scripts_from_api("scriptblox", "fetch", **params)
+    scripts, error = await pagination.fill(lambda page_num: fetch_browse("scriptblox", mode, page_num, **filters),
+                                           max_results, pagination.matcher(filters))
     if error:
         await interaction.followup.send(f"❌ {error}")
         return
     
-    if "result" in data and "scripts" in data["result"]:
-        scripts = data["result"]["scripts"]
-        if not scripts:
-            await interaction.followup.send("No scripts found with the specified filters.")
-            return
-        temp_msg = await interaction.followup.send("Fetching data...")
-        await display_scripts_local(interaction, temp_msg, scripts, api="scriptblox")
-    else:
-        await interaction.followup.send("No scripts found.")
+    if not scripts:
+        await interaction.followup.send("No scripts found with the specified filters.")
+        return
+    temp_msg = await interaction.followup.send("Fetching data...")
+    await display_scripts_local(interaction, temp_msg, scripts, api="scriptblox")
+
+@slash_fetch.autocomplete("place_id")
+async def slash_fetch_place_id_autocomplete(interaction: discord.Interaction, current: str):
+    choices = []
+    for name, place_id in game_index.complete(current):
+        label = f"{name} ({place_id})"
+        if len(label) > autocomplete.MAX_CHOICE_LENGTH:
+            label = f"{name[:autocomplete.MAX_CHOICE_LENGTH - len(place_id) - 4]}… ({place_id})"
+        choices.append(app_commands.Choice(name=label, value=place_id))
+    return choices
 
 @bot.tree.command(name="trending", description="View trending scripts")
-@app_commands.describe(api="Choose API (scriptblox or rscripts)")
+@app_commands.describe(api=f"Choose API ({api_choices()})")
 async def slash_trending(interaction: discord.Interaction, api: str = "scriptblox"):
     await interaction.response.defer()
-    if api.lower() not in ["scriptblox", "rscripts"]:
-        await interaction.followup.send("❌ Invalid API. Choose 'scriptblox' or 'rscripts'.")
+    if api.lower() not in sources.names():
+        await interaction.followup.send(f"❌ Invalid API. Choose {api_choices()}.")
         return
     
-    scripts, error = fetch_trending(api.lower())
+    api = api.lower()
+    temp_msg = await interaction.followup.send("Fetching trending scripts...")
+    # a cold ScriptBlox trending list needs a request per script, so show the
+    # ones that are ready while the rest load
+    partial = []
+    expected = 0
+    async def render_partial():
+        await temp_msg.edit(embed=create_list_embed(partial, api, 0, 1, "+", description=f"Loading {len(partial)}/{expected}..."))
+    progress = progressive.ProgressiveEdit(render_partial, f"trending:{api}")
+    def on_progress(scripts_so_far, total):
+        nonlocal partial, expected
+        partial, expected = scripts_so_far, total
+        progress.update()
+    
+    scripts, error = await fetch_trending(api, on_progress)
+    await progress.done()
     if error:
-        await interaction.followup.send(f"❌ {error}")
+        await temp_msg.edit(content=f"❌ {error}", embed=None)
         return
     
     if not scripts:
-        await interaction.followup.send("No trending scripts found.")
+        await temp_msg.edit(content="No trending scripts found.", embed=None)
         return
     
-    temp_msg = await interaction.followup.send("Fetching trending scripts...")
-    await display_scripts_local(interaction, temp_msg, scripts, api=api.lower())
+    await display_scripts_local(interaction, temp_msg, scripts, api=api)
 
 @bot.tree.command(name="script", description="Fetch a specific script by ID or slug")
 @app_commands.describe(
     script_id="The script ID or slug",
-    api="Choose API (scriptblox or rscripts)"
+    api=f"Choose API ({api_choices()})"
 )
 async def slash_script(interaction: discord.Interaction, script_id: str, api: str = "scriptblox"):
     await interaction.response.defer()
-    if api.lower() not in ["scriptblox", "rscripts"]:
-        await interaction.followup.send("❌ Invalid API. Choose 'scriptblox' or 'rscripts'.")
+    if api.lower() not in sources.names():
+        await interaction.followup.send(f"❌ Invalid API. Choose {api_choices()}.")
         return
     
-    script, error = fetch_script_by_id(api.lower(), script_id)
+    script, error = await fetch_script_by_id(api.lower(), script_id)
     if error:
         await interaction.followup.send(f"❌ {error}")
         return
@@ -723,7 +1097,7 @@ async def slash_script(interaction: discord.Interaction, script_id: str, api: st
 async def slash_executors(interaction: discord.Interaction):
     await interaction.response.defer()
     
-    executors, error = fetch_executors()
+    executors, error = await fetch_executors()
     if error:
         await interaction.followup.send(f"❌ {error}")
         return
@@ -810,21 +1184,6 @@ async def slash_executors(interaction: discord.Interaction):
             await message.edit(content="Interaction timed out.", view=None)
             break
 
-def fetch_rscripts_by_username(username, page=1):
-    try:
-        url = f"https://rscripts.net/api/v2/scripts?page={page}&orderBy=date&sort=desc"
-        headers = {"Username": username}
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        data = r.json()
-        if "scripts" in data:
-            return data["scripts"], None
-        return None, f"No scripts found for '{username}'"
-    except requests.RequestException as e:
-        return None, f"Something went wrong: {e}"
-    except Exception as e:
-        return None, f"Unexpected response format: {e}"
-
 @bot.tree.command(name="rscripts_fetch", description="Browse RScripts with advanced filters")
 @app_commands.describe(
     verified_only="Show only verified scripts",
@@ -847,47 +1206,34 @@ async def slash_rscripts_fetch(
 ):
     await interaction.response.defer()
     
-    params = {"q": "", "page": 1, "notPaid": True}
-    if verified_only is not None:
-        params["verifiedOnly"] = verified_only
-    if no_key_system is not None:
-        params["noKeySystem"] = no_key_system
-    if mobile_only is not None:
-        params["mobileOnly"] = mobile_only
-    if unpatched is not None:
-        params["unpatched"] = unpatched
-    if order_by:
-        params["orderBy"] = order_by
-    if sort:
-        params["sort"] = sort
+    filters = {"verifiedOnly": verified_only, "noKeySystem": no_key_system, "mobileOnly": mobile_only,
+               "unpatched": unpatched, "orderBy": order_by, "sort": sort}
+    scripts, error = await pagination.fill(lambda page_num: fetch_browse("rscripts", "free", page_num, **filters),
+                                           max_results, pagination.matcher(filters))
+    if error:
+        await interaction.followup.send(f"❌ {error}")
+        return
     
-    query_string = urllib.parse.urlencode(params)
-    url = f"https://rscripts.net/api/v2/scripts?{query_string}"
+    if not scripts:
+        await interaction.followup.send("No scripts found with those filters")
+        return
     
-    try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
-        
-        if "scripts" in data:
-            scripts = data["scripts"][:max_results]
-            if not scripts:
-                await interaction.followup.send("No scripts found with those filters")
-                return
-            
-            temp_msg = await interaction.followup.send("Loading scripts...")
-            await display_scripts_local(interaction, temp_msg, scripts, api="rscripts")
-        else:
-            await interaction.followup.send("No scripts found")
-    except Exception as e:
-        await interaction.followup.send(f"❌ Something went wrong: {e}")
+    temp_msg = await interaction.followup.send("Loading scripts...")
+    await display_scripts_local(interaction, temp_msg, scripts, api="rscripts")
 
 @bot.tree.command(name="rscripts_by_user", description="Find all scripts by a specific RScripts creator")
 @app_commands.describe(username="The creator's username")
 async def slash_rscripts_by_user(interaction: discord.Interaction, username: str):
     await interaction.response.defer()
     
-    scripts, error = fetch_rscripts_by_username(username)
+    key = username.strip().lower()
+    cached = user_scripts.get(key)
+    if cached is not None:
+        temp_msg = await interaction.followup.send(f"Loading scripts by {username}...")
+        await display_scripts_local(interaction, temp_msg, cached, api="rscripts")
+        return
+    
+    scripts, total_pages, error = await fetch_rscripts_by_username(username)
     if error:
         await interaction.followup.send(f"❌ {error}")
         return
@@ -896,8 +1242,29 @@ async def slash_rscripts_by_user(interaction: discord.Interaction, username: str
         await interaction.followup.send(f"No scripts found for '{username}'")
         return
     
+    # the first page is shown right away, the rest stream in behind it
+    async def rest():
+        pages = {1: scripts}
+        failed = False
+        async for page, more, page_error in fetch_rscripts_user_pages(username, total_pages or 1):
+            if page_error:
+                failed = True
+            elif more:
+                pages[page] = more
+                yield more
+        if not failed:
+            user_scripts.set(key, [script for page in sorted(pages) for script in pages[page]])
+    
+    # pages land out of order; keep the list newest first like upstream
+    def newest_first(found):
+        return sorted(found, key=lambda script: script.created_at, reverse=True)
+    
     temp_msg = await interaction.followup.send(f"Loading scripts by {username}...")
-    await display_scripts_local(interaction, temp_msg, scripts, api="rscripts")
+    pending = rest()
+    try:
+        await display_scripts_local(interaction, temp_msg, scripts, api="rscripts", pending=pending, rank=newest_first)
+    finally:
+        await pending.aclose()
 
 async def run_bot():
     while True:
@@ -0,0 +1,291 @@
+# Wrappers that add the same behaviour to every ScriptSource. Each one takes
+# a source and exposes the same search / get / trending / browse / by_user /
+# recent methods, so they stack: main.py builds
+# Cached(Indexing(Retrying(Instrumented(provider)))).
+
+import asyncio
+import random
+import time
+import cache
+import circuit
+import models
+
+MAX_RETRIES = 2
+RETRY_BASE_DELAY = 0.5
+
+class SourceWrapper:
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+        self.label = inner.label
+        self.short = inner.short
+        self.icon = inner.icon
+
+    def page_url(self, script):
+        return self.inner.page_url(script)
+
+    def raw_link(self, script):
+        return self.inner.raw_link(script)
+
+    def download_url(self, script):
+        return self.inner.download_url(script)
+
+    def copy_text(self, script):
+        return self.inner.copy_text(script)
+
+    async def search(self, query, mode, page, **filters):
+        return await self.inner.search(query, mode, page, **filters)
+
+    async def get(self, script_id):
+        return await self.inner.get(script_id)
+
+    async def trending(self, progress=None):
+        return await self.inner.trending(progress)
+
+    async def browse(self, mode, page, **filters):
+        return await self.inner.browse(mode, page, **filters)
+
+    async def by_user(self, username, page=1):
+        return await self.inner.by_user(username, page)
+
+    async def recent(self, page=1):
+        return await self.inner.recent(page)
+
+# per method call counts, failures and latency of the calls that reach upstream
+class InstrumentedSource(SourceWrapper):
+    def __init__(self, inner):
+        super().__init__(inner)
+        self.stats = {}
+
+    async def _timed(self, method, coro):
+        st = self.stats.setdefault(method, {"calls": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0})
+        start = time.monotonic()
+        try:
+            return await coro
+        except Exception:
+            st["errors"] += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            st["calls"] += 1
+            st["total_time"] += elapsed
+            st["max_time"] = max(st["max_time"], elapsed)
+
+    async def search(self, query, mode, page, **filters):
+        return await self._timed("search", self.inner.search(query, mode, page, **filters))
+
+    async def get(self, script_id):
+        return await self._timed("get", self.inner.get(script_id))
+
+    async def trending(self, progress=None):
+        return await self._timed("trending", self.inner.trending(progress))
+
+    async def browse(self, mode, page, **filters):
+        return await self._timed("browse", self.inner.browse(mode, page, **filters))
+
+    async def by_user(self, username, page=1):
+        return await self._timed("by_user", self.inner.by_user(username, page))
+
+    async def recent(self, page=1):
+        return await self._timed("recent", self.inner.recent(page))
+
+def is_transient(error):
+    if isinstance(error, circuit.CircuitOpenError):
+        return False
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "status", None)
+    if status is not None:
+        return status >= 500
+    # connection resets and the like; SourceError and decode errors aren't
+    return type(error).__module__.startswith("aiohttp")
+
+# retries timeouts, dropped connections and 5xx with jittered backoff
+class RetryingSource(SourceWrapper):
+    def __init__(self, inner, max_retries=MAX_RETRIES, base_delay=RETRY_BASE_DELAY):
+        super().__init__(inner)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.retries = 0
+
+    async def _retry(self, fn):
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(self.base_delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    async def search(self, query, mode, page, **filters):
+        return await self._retry(lambda: self.inner.search(query, mode, page, **filters))
+
+    async def get(self, script_id):
+        return await self._retry(lambda: self.inner.get(script_id))
+
+    async def trending(self, progress=None):
+        return await self._retry(lambda: self.inner.trending(progress))
+
+    async def browse(self, mode, page, **filters):
+        return await self._retry(lambda: self.inner.browse(mode, page, **filters))
+
+    async def by_user(self, username, page=1):
+        return await self._retry(lambda: self.inner.by_user(username, page))
+
+    async def recent(self, page=1):
+        return await self._retry(lambda: self.inner.recent(page))
+
+# feeds every script that comes back from upstream into the local indexes
+# (anything with add / add_many)
+class IndexingSource(SourceWrapper):
+    def __init__(self, inner, *indexes):
+        super().__init__(inner)
+        self.indexes = indexes
+
+    def _add(self, scripts):
+        for index in self.indexes:
+            index.add_many(scripts)
+
+    async def search(self, query, mode, page, **filters):
+        scripts, total_pages = await self.inner.search(query, mode, page, **filters)
+        self._add(scripts)
+        return scripts, total_pages
+
+    async def get(self, script_id):
+        script = await self.inner.get(script_id)
+        self._add([script])
+        return script
+
+    async def trending(self, progress=None):
+        scripts = await self.inner.trending(progress)
+        self._add(scripts)
+        return scripts
+
+    async def browse(self, mode, page, **filters):
+        scripts, total_pages = await self.inner.browse(mode, page, **filters)
+        self._add(scripts)
+        return scripts, total_pages
+
+    async def by_user(self, username, page=1):
+        scripts, total_pages = await self.inner.by_user(username, page)
+        self._add(scripts)
+        return scripts, total_pages
+
+    async def recent(self, page=1):
+        scripts, total_pages = await self.inner.recent(page)
+        self._add(scripts)
+        return scripts, total_pages
+
+# Memory + disk caching, request coalescing and serving stale data while the
+# source's circuit breaker is open. The cache objects are shared between
+# sources (keys start with the source name) and owned by main.py.
+class CachedSource(SourceWrapper):
+    def __init__(self, inner, search_cache, details, trending_cache, inflight, store, popular,
+                 search_disk_ttl, detail_disk_ttl, spawn):
+        super().__init__(inner)
+        self.search_cache = search_cache
+        self.details = details
+        self.trending_cache = trending_cache
+        self.inflight = inflight
+        self.store = store
+        self.popular = popular
+        self.search_disk_ttl = search_disk_ttl
+        self.detail_disk_ttl = detail_disk_ttl
+        self.spawn = spawn
+
+    def upstream_down(self):
+        breaker = circuit.get(self.name)
+        return breaker is not None and breaker.state != circuit.CLOSED
+
+    async def search(self, query, mode, page, **filters):
+        key = cache.search_key(self.name, query, mode, page, filters)
+        if page == 1 and self.popular is not None:
+            self.popular.record(key, (self.name, query, mode, filters))
+        return await self._listing(key, lambda: self.refresh_search(query, mode, page, **filters))
+
+    # cached like a search without a query
+    async def browse(self, mode, page, **filters):
+        key = cache.search_key(self.name, "", mode, page, dict(filters, browse=True))
+        return await self._listing(key, lambda: self._refresh(key, lambda: self.inner.browse(mode, page, **filters)))
+
+    async def _listing(self, key, refresh):
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        # a disk hit older than the memory TTL is still served, but refreshed behind it
+        stored = await self.store.get_with_age("search", key)
+        if stored is not None:
+            (scripts, total_pages), age = stored
+            result = (models.scripts_from_json(scripts), total_pages)
+            if age < self.search_cache.ttl:
+                self.search_cache.set(key, result, ttl=self.search_cache.ttl - age)
+            else:
+                self.spawn(refresh())
+            return result
+        try:
+            return await refresh()
+        except Exception:
+            stale = self.search_cache.get_stale(key) if self.upstream_down() else None
+            if stale is None:
+                raise
+            return stale
+
+    async def refresh_search(self, query, mode, page, **filters):
+        key = cache.search_key(self.name, query, mode, page, filters)
+        return await self._refresh(key, lambda: self.inner.search(query, mode, page, **filters))
+
+    async def _refresh(self, key, fetch):
+        result = await self.inflight.do(("search",) + key, fetch)
+        self.search_cache.set(key, result)
+        scripts, total_pages = result
+        await self.store.set("search", key, (models.scripts_to_json(scripts), total_pages), self.search_disk_ttl)
+        return result
+
+    async def get(self, script_id):
+        key = (self.name, str(script_id))
+        script = self.details.get(key)
+        if script is None:
+            stored = await self.store.get("script", key)
+            if stored is not None:
+                script = models.Script.from_dict(stored)
+                self.details.set(key, script)
+        if script is not None:
+            return script
+        try:
+            script = await self.inflight.do(("script",) + key, lambda: self.inner.get(script_id))
+        except Exception:
+            stale = self.details.get_stale(key) if self.upstream_down() else None
+            if stale is None:
+                raise
+            return stale
+        # stored under the lookup key plus the script's own id and slug
+        for alias in {str(script_id), script.id, script.slug}:
+            if alias:
+                self.details.set((self.name, alias), script)
+                await self.store.set("script", (self.name, alias), script.to_dict(), self.detail_disk_ttl)
+        return script
+
+    # only the caller that starts a fetch gets progress; ones that join it wait
+    # for the full list
+    async def _load_trending(self, progress=None):
+        try:
+            return await self.inflight.do(("trending", self.name), lambda: self.inner.trending(progress)), None
+        except Exception as e:
+            return None, e
+
+    async def trending(self, progress=None):
+        scripts, error = await self.trending_cache.get(self.name, lambda: self._load_trending(progress))
+        if error is not None:
+            raise error
+        return scripts
+
+    async def refresh_trending(self):
+        _, error = await self.trending_cache.refresh(self.name, self._load_trending)
+        if error is not None:
+            raise error
+
+    async def by_user(self, username, page=1):
+        return await self.inflight.do(("by_user", self.name, username.lower(), page), lambda: self.inner.by_user(username, page))
@@ -0,0 +1,132 @@
+# Normalized script record shared by every command. Upstream payloads are
+# converted as soon as they're fetched so caches and open paginators only keep
+# the fields we actually render, not the whole ScriptBlox / RScripts JSON.
+
+from dataclasses import dataclass, fields
+
+# long enough for the embed preview and the Copy button's message, which
+# discord caps at 2000 characters anyway; the Raw link has the rest
+MAX_BODY_CHARS = 1800
+
+@dataclass(slots=True)
+class Script:
+    source: str
+    id: str = ""
+    slug: str = ""
+    title: str = "No Title"
+    game_name: str = "Unknown Game"
+    game_id: str = ""
+    image: str = ""
+    views: int = 0
+    likes: int = 0
+    dislikes: int = 0
+    verified: bool = False
+    paid: bool = False
+    key: bool = False
+    key_link: str = ""
+    patched: bool = False
+    universal: bool = False
+    mobile_ready: bool = False
+    owner: str = "Unknown"
+    owner_avatar: str = ""
+    tags: tuple = ()
+    created_at: str = ""
+    updated_at: str = ""
+    body: str = ""
+    body_truncated: bool = False
+    raw_url: str = ""
+
+    def to_dict(self):
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["tags"] = list(self.tags)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        data = {k: v for k, v in data.items() if k in known}
+        data["tags"] = tuple(data.get("tags") or ())
+        return cls(**data)
+
+def _truncate(body):
+    body = body or ""
+    if len(body) > MAX_BODY_CHARS:
+        return body[:MAX_BODY_CHARS], True
+    return body, False
+
+def _tag_names(tags):
+    names = []
+    for tag in tags or ():
+        name = tag.get("name") if isinstance(tag, dict) else tag
+        if name:
+            names.append(str(name))
+    return tuple(names)
+
+def from_scriptblox(data):
+    game = data.get("game") or {}
+    owner = data.get("owner") or {}
+    body, truncated = _truncate(data.get("script"))
+    return Script(
+        source="scriptblox",
+        id=data.get("_id") or "",
+        slug=data.get("slug") or "",
+        title=data.get("title") or "No Title",
+        game_name=game.get("name") or "Unknown Game",
+        game_id=str(game.get("gameId") or ""),
+        image=data.get("image") or game.get("imageUrl") or "",
+        views=data.get("views") or 0,
+        likes=data.get("likeCount") or 0,
+        dislikes=data.get("dislikeCount") or 0,
+        verified=bool(data.get("verified")),
+        paid=(data.get("scriptType") or "free").lower() != "free",
+        key=bool(data.get("key")),
+        key_link=data.get("keyLink") or "",
+        patched=bool(data.get("isPatched")),
+        universal=bool(data.get("isUniversal")),
+        owner=owner.get("username") or "Unknown",
+        owner_avatar=owner.get("profilePicture") or "",
+        tags=_tag_names(data.get("tags")),
+        created_at=data.get("createdAt") or "",
+        updated_at=data.get("updatedAt") or "",
+        body=body,
+        body_truncated=truncated,
+    )
+
+def from_rscripts(data):
+    user = data.get("user") or {}
+    if isinstance(user, list):
+        user = user[0] if user else {}
+    game = data.get("game") or {}
+    return Script(
+        source="rscripts",
+        id=str(data.get("_id") or data.get("id") or ""),
+        slug=data.get("slug") or "",
+        title=data.get("title") or "No Title",
+        game_name=game.get("title") or game.get("name") or "Unknown Game",
+        game_id=str(game.get("placeId") or game.get("gameId") or ""),
+        image=data.get("image") or "",
+        views=data.get("views") or 0,
+        likes=data.get("likes") or 0,
+        dislikes=data.get("dislikes") or 0,
+        verified=bool(user.get("verified")),
+        paid=bool(data.get("paid")),
+        key=bool(data.get("keySystem")),
+        mobile_ready=bool(data.get("mobileReady")),
+        owner=user.get("username") or "Unknown",
+        owner_avatar=user.get("image") or "",
+        tags=_tag_names(data.get("tags")),
+        created_at=data.get("createdAt") or "",
+        updated_at=data.get("lastUpdated") or data.get("updatedAt") or "",
+        raw_url=data.get("rawScript") or "",
+    )
+
+def scripts_to_json(scripts):
+    return [script.to_dict() for script in scripts] if scripts is not None else None
+
+def scripts_from_json(data):
+    return [Script.from_dict(item) for item in data] if data is not None else None
+
+ADAPTERS = {"scriptblox": from_scriptblox, "rscripts": from_rscripts}
+
+def from_api(api, data):
+    return ADAPTERS[api](data)
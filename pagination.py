@@ -0,0 +1,73 @@
+# Fills a result list from upstream pages. Filters are sent upstream, but a
+# page can still come back with scripts that don't pass them (or fewer than
+# asked for), so pages are pulled one at a time until enough scripts pass
+# the filters, upstream runs out, or MAX_PAGES have been read.
+
+MAX_PAGES = 5
+
+# stats for !cachestats
+stats = {"runs": 0, "pages": 0, "filled": 0, "dropped": 0}
+
+class PageError(Exception):
+    pass
+
+# fetch_page(page) -> (scripts, total_pages or None, error)
+async def pages(fetch_page, max_pages=MAX_PAGES):
+    page = 1
+    while page <= max_pages:
+        scripts, total_pages, error = await fetch_page(page)
+        stats["pages"] += 1
+        if error:
+            # the first page failing is the command failing; later ones just
+            # end the list early
+            if page == 1:
+                raise PageError(error)
+            return
+        if not scripts:
+            return
+        yield scripts
+        if total_pages is not None and page >= total_pages:
+            return
+        page += 1
+
+# -> (up to `want` scripts that pass keep(script), error)
+async def fill(fetch_page, want, keep=None, max_pages=MAX_PAGES):
+    stats["runs"] += 1
+    found = []
+    stream = pages(fetch_page, max_pages)
+    try:
+        async for scripts in stream:
+            for script in scripts:
+                if keep is None or keep(script):
+                    found.append(script)
+                    if len(found) >= want:
+                        break
+                else:
+                    stats["dropped"] += 1
+            if len(found) >= want:
+                stats["filled"] += 1
+                break
+    except PageError as e:
+        return None, str(e)
+    finally:
+        await stream.aclose()
+    return found, None
+
+# local check of the /fetch and /rscripts_fetch filters; ScriptBlox ones
+# are yes/no/any, the RScripts "...Only" ones only narrow when switched on
+EXACT_FILTERS = {"verified": "verified", "patched": "patched", "key": "key", "universal": "universal"}
+ONLY_FILTERS = {"verifiedOnly": ("verified", True), "noKeySystem": ("key", False), "mobileOnly": ("mobile_ready", True)}
+
+def matcher(filters):
+    checks = []
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if name in EXACT_FILTERS:
+            checks.append((EXACT_FILTERS[name], bool(value)))
+        elif name in ONLY_FILTERS and value:
+            checks.append(ONLY_FILTERS[name])
+
+    def keep(script):
+        return all(getattr(script, field) == expected for field, expected in checks)
+    return keep
@@ -0,0 +1,30 @@
+# Tracks how often each search is run so the most popular ones can be warmed.
+
+from collections import Counter
+
+MAX_TRACKED = 2000
+
+class PopularQueries:
+    def __init__(self, max_tracked=MAX_TRACKED):
+        self.max_tracked = max_tracked
+        self.counts = Counter()
+        self.args = {}
+
+    # key is the canonical cache key, args whatever is needed to re-run it
+    def record(self, key, args):
+        self.counts[key] += 1
+        self.args[key] = args
+        if len(self.counts) > self.max_tracked:
+            self._prune()
+
+    # halve every count and drop the tail, so old favourites fade out
+    def _prune(self):
+        keep = self.counts.most_common(self.max_tracked // 2)
+        self.counts = Counter({key: count // 2 or 1 for key, count in keep})
+        self.args = {key: self.args[key] for key in self.counts}
+
+    def top(self, k):
+        return [(key, self.args[key], count) for key, count in self.counts.most_common(k)]
+
+    def __len__(self):
+        return len(self.counts)
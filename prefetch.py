@@ -0,0 +1,37 @@
+# Background prefetch of the next upstream result page while a paginator is open.
+
+import asyncio
+
+# shared across every paginator so the hit rate can be reported from !cachestats
+stats = {"issued": 0, "hits": 0, "waited": 0, "misses": 0, "wasted": 0}
+
+def hit_rate():
+    used = stats["hits"] + stats["waited"] + stats["misses"]
+    return (stats["hits"] + stats["waited"]) / used if used else 0.0
+
+class Prefetcher:
+    def __init__(self, fetch_page):
+        self.fetch_page = fetch_page
+        self.tasks = {}
+
+    def prefetch(self, page_num):
+        if page_num in self.tasks:
+            return
+        self.tasks[page_num] = asyncio.ensure_future(self.fetch_page(page_num))
+        stats["issued"] += 1
+
+    # hits finished before they were needed, waited were still in flight
+    async def get(self, page_num):
+        task = self.tasks.pop(page_num, None)
+        if task is None:
+            stats["misses"] += 1
+            return await self.fetch_page(page_num)
+        stats["hits" if task.done() else "waited"] += 1
+        return await task
+
+    def cancel(self):
+        for task in self.tasks.values():
+            if not task.done():
+                task.cancel()
+            stats["wasted"] += 1
+        self.tasks.clear()
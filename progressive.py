@@ -0,0 +1,86 @@
+# Partial results for slow operations. The caller keeps its own state and
+# passes a render coroutine that edits the message from it; update() asks for
+# a redraw and the edits are throttled to one per EDIT_INTERVAL, with bursts
+# of updates collapsed into a single edit of the latest state. Discord allows
+# about five edits per five seconds on a message before it starts returning
+# 429s.
+#
+# Time to first result (from creation to the first update() or done()) is
+# tracked per metric name for !cachestats; metric=None skips it.
+
+import asyncio
+import time
+
+EDIT_INTERVAL = 1.2
+
+stats = {}
+
+def _metric(name):
+    if name is None:
+        return {"runs": 0, "total_ttfr": 0.0, "max_ttfr": 0.0, "edits": 0, "coalesced": 0}
+    return stats.setdefault(name, {"runs": 0, "total_ttfr": 0.0, "max_ttfr": 0.0, "edits": 0, "coalesced": 0})
+
+def summary():
+    result = {}
+    for name, st in stats.items():
+        result[name] = dict(st, avg_ttfr=st["total_ttfr"] / st["runs"] if st["runs"] else 0.0)
+    return result
+
+class ProgressiveEdit:
+    def __init__(self, render, metric=None, interval=EDIT_INTERVAL):
+        self.render = render
+        self.metric = _metric(metric)
+        self.interval = interval
+        self.started = time.monotonic()
+        self.first_result = None
+        self.last_edit = 0.0
+        self.dirty = False
+        self.rendering = False
+        self.closed = False
+        self.task = None
+
+    def _mark_first(self):
+        if self.first_result is None:
+            self.first_result = time.monotonic() - self.started
+            self.metric["runs"] += 1
+            self.metric["total_ttfr"] += self.first_result
+            self.metric["max_ttfr"] = max(self.metric["max_ttfr"], self.first_result)
+
+    def update(self):
+        if self.closed:
+            return
+        self._mark_first()
+        if self.dirty:
+            self.metric["coalesced"] += 1
+        self.dirty = True
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        while self.dirty:
+            wait = self.last_edit + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.dirty = False
+            self.last_edit = time.monotonic()
+            self.metric["edits"] += 1
+            self.rendering = True
+            try:
+                await self.render()
+            except Exception as e:
+                # a lost partial render isn't worth failing the command over
+                print(f"Progressive edit failed: {e}")
+            finally:
+                self.rendering = False
+
+    # drops any queued partial edit and waits out one that's already being
+    # sent; call before the final render so a late partial can't overwrite it
+    async def done(self):
+        self._mark_first()
+        self.closed = True
+        self.dirty = False
+        if self.task is not None:
+            if not self.rendering:
+                self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
@@ -0,0 +1,130 @@
+# Per-host token buckets shared by every upstream call in http_client.
+# Calls queue for a token instead of failing, and a 429 / Retry-After from the
+# host pauses its bucket until the given time.
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# requests per second and burst size per host; anything else uses DEFAULT_LIMIT
+HOST_LIMITS = {
+    "scriptblox.com": (5, 10),
+    "rscripts.net": (3, 6),
+    "rawscripts.net": (5, 10),
+}
+DEFAULT_LIMIT = (5, 10)
+MAX_RETRY_AFTER = 60
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            # the lock keeps waiters in FIFO order
+            async with self.lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - start
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def pause(self, seconds, throttled=False):
+        seconds = min(seconds, MAX_RETRY_AFTER)
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        if throttled:
+            self.throttled += 1
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait": self.max_wait,
+            "throttled": self.throttled,
+            "paused_for": max(0.0, self.paused_until - time.monotonic()),
+        }
+
+_buckets = {}
+
+def bucket_for(host):
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    bucket = _buckets.get(host)
+    if bucket is None:
+        rate, capacity = HOST_LIMITS.get(host, DEFAULT_LIMIT)
+        bucket = _buckets[host] = TokenBucket(rate, capacity)
+    return bucket
+
+def all_stats():
+    return {host: bucket.stats() for host, bucket in _buckets.items()}
+
+# Retry-After is either seconds or an HTTP date
+def parse_retry_after(value):
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+# how long to back off based on a response's headers, None if they don't say
+def backoff_from_headers(headers):
+    delay = parse_retry_after(headers.get("Retry-After"))
+    if delay is not None:
+        return delay
+    remaining = headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining")
+    reset = headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset")
+    if remaining is None or reset is None:
+        return None
+    try:
+        remaining = int(float(remaining))
+        reset = float(reset)
+    except ValueError:
+        return None
+    if remaining > 0:
+        return None
+    # some hosts send an epoch timestamp, others seconds until reset
+    if reset > time.time():
+        reset -= time.time()
+    return max(0.0, reset)
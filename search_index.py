@@ -0,0 +1,227 @@
+# In-process full-text index over every script the bot has fetched, so
+# searches can be answered locally when upstream is slow or down. BM25 over
+# title, game name, owner and tags; title and game words are counted twice so
+# a match there outranks one in a tag.
+#
+# Each term's postings are grouped by (term frequency, document length). Every
+# document in a group gets the same BM25 contribution, so a query works out
+# one score per group instead of per document and walks the groups best first.
+# Replaced or evicted documents are tombstoned and the postings are compacted
+# once enough of them pile up. The indexed copy of a script drops its body to
+# keep the index small; the Raw link still has it.
+
+import dataclasses
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+K1 = 1.2
+B = 0.75
+COMPACT_RATIO = 0.25
+
+_token_re = re.compile(r"\w+")
+
+def tokenize(text):
+    return _token_re.findall(text.lower()) if text else []
+
+def _fields(script):
+    return (script.title, script.game_name, script.owner, " ".join(script.tags))
+
+def _terms(script):
+    title = tokenize(script.title)
+    game = tokenize(script.game_name) if script.game_name != "Unknown Game" else []
+    owner = tokenize(script.owner) if script.owner != "Unknown" else []
+    tags = [t for tag in script.tags for t in tokenize(tag)]
+    return title + title + game + game + owner + tags
+
+class SearchIndex:
+    def __init__(self, max_docs=200000):
+        self.max_docs = max_docs
+        self.postings = {}
+        self.df = {}
+        self.docs = []
+        self.lengths = array("I")
+        self.by_key = {}
+        self.live = 0
+        self.dead = 0
+        self.total_length = 0
+        self.oldest = 0
+        self.added = 0
+        self.updated = 0
+        self.evicted = 0
+        self.queries = 0
+
+    def __len__(self):
+        return self.live
+
+    def add(self, script):
+        key = (script.source, script.id or script.slug)
+        if not key[1]:
+            return
+        doc = self.by_key.get(key)
+        stored = dataclasses.replace(script, body="", body_truncated=bool(script.body) or script.body_truncated)
+        if doc is not None:
+            if _fields(self.docs[doc]) == _fields(script):
+                # same words, only counts changed; no need to touch the postings
+                self.docs[doc] = stored
+                self.updated += 1
+                return
+            self._remove(doc)
+        elif self.live >= self.max_docs:
+            self._evict_oldest()
+        terms = _terms(script)
+        length = len(terms)
+        doc = len(self.docs)
+        self.docs.append(stored)
+        self.lengths.append(length)
+        self.by_key[key] = doc
+        for term, tf in Counter(terms).items():
+            self.df[term] = self.df.get(term, 0) + 1
+            groups = self.postings.get(term)
+            if groups is None:
+                groups = self.postings[term] = {}
+            docs = groups.get((tf, length))
+            if docs is None:
+                docs = groups[(tf, length)] = array("I")
+            docs.append(doc)
+        self.live += 1
+        self.total_length += length
+        self.added += 1
+        if self.dead > COMPACT_RATIO * len(self.docs) and self.dead > 1000:
+            self.compact()
+
+    def add_many(self, scripts):
+        for script in scripts or ():
+            self.add(script)
+
+    def _remove(self, doc):
+        script = self.docs[doc]
+        for term in set(_terms(script)):
+            self.df[term] -= 1
+            if not self.df[term]:
+                del self.df[term]
+        del self.by_key[(script.source, script.id or script.slug)]
+        self.docs[doc] = None
+        self.total_length -= self.lengths[doc]
+        self.live -= 1
+        self.dead += 1
+
+    def _evict_oldest(self):
+        while self.docs[self.oldest] is None:
+            self.oldest += 1
+        self._remove(self.oldest)
+        self.evicted += 1
+
+    # renumbers the live documents and rebuilds the postings without tombstones
+    def compact(self):
+        renumber = {}
+        docs, lengths = [], array("I")
+        for old, script in enumerate(self.docs):
+            if script is not None:
+                renumber[old] = len(docs)
+                docs.append(script)
+                lengths.append(self.lengths[old])
+        postings = {}
+        for term, groups in self.postings.items():
+            kept_groups = {}
+            for group, entries in groups.items():
+                kept = array("I", (renumber[doc] for doc in entries if doc in renumber))
+                if kept:
+                    kept_groups[group] = kept
+            if kept_groups:
+                postings[term] = kept_groups
+        self.postings = postings
+        self.docs, self.lengths = docs, lengths
+        self.by_key = {(s.source, s.id or s.slug): doc for doc, s in enumerate(docs)}
+        self.dead = 0
+        self.oldest = 0
+
+    # [(contribution, docs)] for one term, best first
+    def _impacts(self, term, avg_length):
+        df = self.df.get(term, 0)
+        idf = math.log(1 + (self.live - df + 0.5) / (df + 0.5))
+        impacts = []
+        for (tf, length), docs in self.postings[term].items():
+            impacts.append((idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length)), docs))
+        impacts.sort(key=itemgetter(0), reverse=True)
+        return impacts
+
+    def _keep(self, doc, source, paid):
+        script = self.docs[doc]
+        if script is None:
+            return False
+        if source is not None and script.source != source:
+            return False
+        return paid is None or script.paid == paid
+
+    # -> [(score, Script)], best first
+    def search(self, query, limit=50, source=None, paid=None):
+        self.queries += 1
+        terms = sorted((t for t in set(tokenize(query)) if t in self.df), key=self.df.get)
+        if not terms or not self.live:
+            return []
+        avg_length = self.total_length / self.live
+        impacts = [self._impacts(term, avg_length) for term in terms]
+        if len(impacts) == 1:
+            # one term: the best groups hold the best documents, so stop as
+            # soon as there are enough
+            results = []
+            for score, docs in impacts[0]:
+                for doc in docs:
+                    if self._keep(doc, source, paid):
+                        results.append((score, self.docs[doc]))
+                        if len(results) >= limit:
+                            return results
+            return results
+        # Rarest term first. Once the current top `limit` all beat the most
+        # the remaining terms could give a document that hasn't matched yet
+        # (MaxScore), later terms only add to documents already scored.
+        remaining = [0.0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + impacts[i][0][0]
+        scores = {}
+        for i, groups in enumerate(impacts):
+            if i == 0:
+                for score, docs in groups:
+                    scores.update(dict.fromkeys(docs, score))
+            elif self._threshold(scores, limit, source, paid) >= remaining[i]:
+                for score, docs in groups:
+                    for doc in scores.keys() & docs:
+                        scores[doc] += score
+            else:
+                for score, docs in groups:
+                    for doc in docs:
+                        scores[doc] = scores.get(doc, 0.0) + score
+        return [(score, self.docs[doc]) for doc, score in self._top(scores, limit, source, paid)]
+
+    def _top(self, scores, limit, source, paid):
+        # most of the best entries pass the filters, so try a small slice first
+        top = heapq.nlargest(limit * 2, scores.items(), key=itemgetter(1))
+        kept = [(doc, score) for doc, score in top if self._keep(doc, source, paid)]
+        if len(kept) >= limit or len(top) == len(scores):
+            return kept[:limit]
+        candidates = ((doc, score) for doc, score in scores.items() if self._keep(doc, source, paid))
+        return heapq.nlargest(limit, candidates, key=itemgetter(1))
+
+    # lowest score in the current top `limit`, or 0 while there are fewer
+    def _threshold(self, scores, limit, source, paid):
+        if len(scores) < limit:
+            return 0.0
+        top = self._top(scores, limit, source, paid)
+        return top[-1][1] if len(top) >= limit else 0.0
+
+    def stats(self):
+        return {
+            "documents": self.live,
+            "tombstones": self.dead,
+            "terms": len(self.postings),
+            "postings": sum(len(docs) for groups in self.postings.values() for docs in groups.values()),
+            "max_docs": self.max_docs,
+            "added": self.added,
+            "updated": self.updated,
+            "evicted": self.evicted,
+            "queries": self.queries,
+        }
@@ -0,0 +1,221 @@
+# Script sites behind one interface. Each provider only knows how to build its
+# URLs and unwrap its responses into models.Script; caching, retries and
+# metrics are layered on top in middleware.py, and commands look sources up
+# by name through get(), so adding a site means writing one class here and
+# registering it.
+
+import asyncio
+import urllib.parse
+from typing import Protocol
+import http_client
+import models
+
+TRENDING_HYDRATE_CONCURRENCY = 8
+
+# not-found / unexpected-shape answers; the message is shown to the user as is
+class SourceError(Exception):
+    pass
+
+class ScriptSource(Protocol):
+    name: str
+    label: str
+    short: str
+    # shown next to the label in list titles
+    icon: str
+
+    # links for a script from this source; copy_text is what the Copy
+    # button hands out, "" if there's nothing to paste
+    def page_url(self, script): ...
+    def raw_link(self, script): ...
+    def download_url(self, script): ...
+    def copy_text(self, script): ...
+
+    # -> (scripts, total_pages or None)
+    async def search(self, query, mode, page, **filters): ...
+    # -> Script
+    async def get(self, script_id): ...
+    # -> [Script]; progress(scripts so far, expected count) may be called as
+    # parts of the list arrive
+    async def trending(self, progress=None): ...
+    # every script matching the filters, no query -> (scripts, total_pages or None)
+    async def browse(self, mode, page, **filters): ...
+    # -> (scripts, total_pages or None)
+    async def by_user(self, username, page=1): ...
+    # every script, most recently updated first -> (scripts, total_pages or None)
+    async def recent(self, page=1): ...
+
+def _flag(value):
+    return 1 if value else 0
+
+class ScriptBloxSource:
+    name = "scriptblox"
+    label = "ScriptBlox"
+    short = "SB"
+    icon = "📊"
+    base = "https://scriptblox.com/api"
+
+    def __init__(self):
+        # set to the fully wrapped source's get() so trending hydration goes
+        # through the detail cache
+        self.lookup = None
+
+    def page_url(self, script):
+        return f"https://scriptblox.com/script/{script.slug}"
+
+    def raw_link(self, script):
+        return f"https://rawscripts.net/raw/{script.slug}"
+
+    def download_url(self, script):
+        return f"https://scriptblox.com/download/{script.id}"
+
+    def copy_text(self, script):
+        return script.body
+
+    def _params(self, params, filters):
+        for name in ("verified", "patched", "key", "universal"):
+            if filters.get(name) is not None:
+                params[name] = _flag(filters[name])
+        for name in ("sortBy", "order", "owner", "placeId", "max"):
+            if filters.get(name):
+                params[name] = filters[name]
+        return urllib.parse.urlencode(params)
+
+    async def search(self, query, mode, page, **filters):
+        params = {"q": query, "mode": mode, "page": page}
+        if filters.get("strict") is not None:
+            params["strict"] = "true" if filters["strict"] else "false"
+        data = await http_client.get_json(f"{self.base}/script/search?{self._params(params, filters)}")
+        return self._page(data, f"Couldn't find any scripts matching '{query}'")
+
+    async def browse(self, mode, page, **filters):
+        params = {"mode": mode, "page": page}
+        data = await http_client.get_json(f"{self.base}/script/fetch?{self._params(params, filters)}")
+        return self._page(data, "No scripts found with the specified filters.")
+
+    async def get(self, script_id):
+        data = await http_client.get_json(f"{self.base}/script/{script_id}", endpoint="scriptblox.com/api/script/{slug}")
+        if "script" not in data:
+            raise SourceError(f"Couldn't find script '{script_id}'")
+        return models.from_scriptblox(data["script"])
+
+    async def trending(self, progress=None):
+        data = await http_client.get_json(f"{self.base}/script/trending")
+        if "result" not in data or "scripts" not in data["result"]:
+            raise SourceError("Nothing trending right now")
+        # the trending list only has slugs, so every entry needs its own detail fetch
+        semaphore = asyncio.Semaphore(TRENDING_HYDRATE_CONCURRENCY)
+        get = self.lookup or self.get
+        slugs = [meta.get("slug") for meta in data["result"]["scripts"] if meta.get("slug")]
+        hydrated = [None] * len(slugs)
+        async def hydrate(i, slug):
+            try:
+                async with semaphore:
+                    hydrated[i] = await get(slug)
+            except Exception:
+                # one slug failing just drops that entry from the list
+                return
+            if progress:
+                progress([script for script in hydrated if script], len(slugs))
+        await asyncio.gather(*(hydrate(i, slug) for i, slug in enumerate(slugs)))
+        return [script for script in hydrated if script]
+
+    async def by_user(self, username, page=1):
+        params = {"owner": username, "page": page}
+        data = await http_client.get_json(f"{self.base}/script/fetch?{urllib.parse.urlencode(params)}")
+        return self._page(data, f"No scripts found for '{username}'")
+
+    async def recent(self, page=1):
+        params = {"sortBy": "updatedAt", "order": "desc", "page": page}
+        data = await http_client.get_json(f"{self.base}/script/fetch?{urllib.parse.urlencode(params)}")
+        return self._page(data, "Couldn't list scripts")
+
+    def _page(self, data, not_found):
+        if "result" not in data or "scripts" not in data["result"]:
+            raise SourceError(not_found)
+        scripts = [models.from_scriptblox(item) for item in data["result"]["scripts"]]
+        return scripts, data["result"].get("totalPages")
+
+class RScriptsSource:
+    name = "rscripts"
+    label = "RScripts"
+    short = "RS"
+    icon = "📜"
+    base = "https://rscripts.net/api/v2"
+
+    def page_url(self, script):
+        return f"https://rscripts.net/script/{script.slug}"
+
+    def raw_link(self, script):
+        return script.raw_url
+
+    def download_url(self, script):
+        return script.raw_url
+
+    def copy_text(self, script):
+        return f'loadstring(game:HttpGet("{script.raw_url}"))()' if script.raw_url else ""
+
+    async def search(self, query, mode, page, **filters):
+        params = {"q": query, "page": page, "notPaid": (mode or "free").lower() != "paid"}
+        for name in ("noKeySystem", "mobileOnly", "verifiedOnly", "unpatched"):
+            if filters.get(name) is not None:
+                params[name] = filters[name]
+        for name in ("orderBy", "sort"):
+            if filters.get(name):
+                params[name] = filters[name]
+        data = await http_client.get_json(f"{self.base}/scripts?{urllib.parse.urlencode(params)}")
+        return self._page(data, f"Couldn't find any scripts matching '{query}'")
+
+    async def get(self, script_id):
+        data = await http_client.get_json(f"{self.base}/script?id={urllib.parse.quote(str(script_id))}", endpoint="rscripts.net/api/v2/script")
+        if not data.get("script"):
+            raise SourceError(f"Couldn't find script '{script_id}'")
+        return models.from_rscripts(data["script"][0])
+
+    async def trending(self, progress=None):
+        data = await http_client.get_json(f"{self.base}/trending")
+        if "success" not in data:
+            raise SourceError("Nothing is trending right now")
+        scripts = []
+        for item in data["success"]:
+            script_data = item.get("script", {})
+            if script_data:
+                script_data["views"] = item.get("views", 0)
+                if item.get("user"):
+                    script_data["user"] = item["user"]
+                scripts.append(models.from_rscripts(script_data))
+        return scripts
+
+    # the listing is the search endpoint without a query
+    async def browse(self, mode, page, **filters):
+        return await self.search("", mode, page, **filters)
+
+    async def by_user(self, username, page=1):
+        url = f"{self.base}/scripts?page={page}&orderBy=date&sort=desc"
+        data = await http_client.get_json(url, headers={"Username": username})
+        return self._page(data, f"No scripts found for '{username}'")
+
+    async def recent(self, page=1):
+        data = await http_client.get_json(f"{self.base}/scripts?page={page}&orderBy=updatedAt&sort=desc")
+        return self._page(data, "Couldn't list scripts")
+
+    def _page(self, data, not_found):
+        if "scripts" not in data:
+            raise SourceError(not_found)
+        scripts = [models.from_rscripts(item) for item in data["scripts"]]
+        info = data.get("info") or {}
+        return scripts, info.get("maxPages")
+
+_registry = {}
+
+def register(source):
+    _registry[source.name] = source
+    return source
+
+def get(name):
+    return _registry.get((name or "").lower())
+
+def names():
+    return list(_registry)
+
+def all_sources():
+    return list(_registry.values())
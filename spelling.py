@@ -0,0 +1,147 @@
+# "Did you mean" for search queries. Vocabulary comes from the game names and
+# script titles the bot has fetched; lookups use a symmetric delete index
+# (every term is stored under each string you can get by deleting up to
+# MAX_DISTANCE characters from its first PREFIX_LENGTH characters), so a
+# query only generates its own deletes and checks the few terms that share
+# one with Levenshtein.distance. Lookup cost depends on the query's length,
+# not on how big the vocabulary is.
+
+import Levenshtein
+from search_index import tokenize
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+# short words have too many neighbours to correct safely
+MIN_WORD_LENGTH = 4
+# a suggestion has to have been seen at least this often
+MIN_COUNT = 2
+
+def _deletes(word, max_distance):
+    found = {word}
+    edge = {word}
+    for _ in range(max_distance):
+        next_edge = set()
+        for w in edge:
+            for i in range(len(w)):
+                d = w[:i] + w[i + 1:]
+                if d not in found:
+                    next_edge.add(d)
+        found |= next_edge
+        edge = next_edge
+    return found
+
+class SymSpell:
+    def __init__(self, max_terms=200000, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+        self.max_terms = max_terms
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.counts = {}
+        self.deletes = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, term):
+        return term in self.counts
+
+    def add(self, term, count=1):
+        if term in self.counts:
+            self.counts[term] += count
+            return
+        if len(self.counts) >= self.max_terms:
+            return
+        self.counts[term] = count
+        for d in _deletes(term[:self.prefix_length], self.max_distance):
+            bucket = self.deletes.get(d)
+            if bucket is None:
+                self.deletes[d] = [term]
+            else:
+                bucket.append(term)
+
+    # -> (term, distance) of the closest known term, most frequent on ties, or None
+    def lookup(self, word, max_distance=None, min_count=1):
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if word in self.counts:
+            return word, 0
+        best = None
+        best_key = None
+        seen = set()
+        for d in _deletes(word[:self.prefix_length], max_distance):
+            for term in self.deletes.get(d, ()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                if abs(len(term) - len(word)) > max_distance or self.counts[term] < min_count:
+                    continue
+                distance = Levenshtein.distance(word, term, score_cutoff=max_distance)
+                if distance > max_distance:
+                    continue
+                key = (distance, -self.counts[term])
+                if best_key is None or key < best_key:
+                    best, best_key = term, key
+        return (best, best_key[0]) if best is not None else None
+
+def _numbers(words):
+    return [word for word in words if any(ch.isdigit() for ch in word)]
+
+def _allowed_distance(word):
+    return 1 if len(word) <= 5 else 2
+
+class QueryCorrector:
+    def __init__(self, max_terms=200000):
+        self.words = SymSpell(max_terms=max_terms)
+        # whole game names, so "blox fruit" and "bloxfruits" find "blox
+        # fruits" even though each word on its own looks fine
+        self.phrases = SymSpell(max_terms=max_terms // 10)
+        self.corrections = 0
+        self.lookups = 0
+
+    def add(self, script):
+        if script.game_name and script.game_name != "Unknown Game":
+            game = " ".join(tokenize(script.game_name))
+            if game:
+                self.phrases.add(game)
+            for word in tokenize(script.game_name):
+                self.words.add(word)
+        for word in tokenize(script.title):
+            self.words.add(word)
+
+    def add_many(self, scripts):
+        for script in scripts or ():
+            self.add(script)
+
+    # -> corrected query, or None when it already looks right
+    def correct(self, query):
+        self.lookups += 1
+        words = tokenize(query)
+        if not words:
+            return None
+        phrase = " ".join(words)
+        if len(phrase) >= MIN_WORD_LENGTH and phrase not in self.phrases and (len(words) > 1 or phrase not in self.words):
+            match = self.phrases.lookup(phrase, _allowed_distance(phrase), MIN_COUNT)
+            # "murder mystery 3" is a different game, not a typo of "... 2"
+            if match and _numbers(match[0].split()) == _numbers(words):
+                self.corrections += 1
+                return match[0]
+        changed = False
+        corrected = []
+        for word in words:
+            if len(word) >= MIN_WORD_LENGTH and word not in self.words and not _numbers([word]):
+                match = self.words.lookup(word, _allowed_distance(word), MIN_COUNT)
+                if match:
+                    word = match[0]
+                    changed = True
+            corrected.append(word)
+        if not changed:
+            return None
+        self.corrections += 1
+        return " ".join(corrected)
+
+    def stats(self):
+        return {
+            "words": len(self.words),
+            "phrases": len(self.phrases),
+            "delete_keys": len(self.words.deletes) + len(self.phrases.deletes),
+            "lookups": self.lookups,
+            "corrections": self.corrections,
+        }
@@ -0,0 +1,62 @@
+# Background cache warming. Each job re-runs on a jittered interval so the
+# caches are refreshed before they expire. All jobs share one small semaphore,
+# and a cycle is put off while interactive requests are queued on the rate
+# limiter, so warming never competes with users for upstream capacity.
+
+import asyncio
+import random
+import ratelimit
+
+CONCURRENCY = 2
+JITTER = 0.2
+STARTUP_DELAY = 10
+BUSY_RETRY_DELAY = 5
+BUSY_RETRIES = 6
+
+def interactive_busy():
+    return any(st["queue_depth"] for st in ratelimit.all_stats().values())
+
+class CacheWarmer:
+    def __init__(self, concurrency=CONCURRENCY):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.jobs = []
+        self.tasks = []
+        self.stats = {}
+
+    def add_job(self, name, interval, fn):
+        self.jobs.append((name, interval, fn))
+        self.stats[name] = {"runs": 0, "failures": 0, "skipped": 0}
+
+    def start(self):
+        if self.tasks:
+            return
+        for name, interval, fn in self.jobs:
+            self.tasks.append(asyncio.ensure_future(self._loop(name, interval, fn)))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _loop(self, name, interval, fn):
+        await asyncio.sleep(random.uniform(0, STARTUP_DELAY))
+        while True:
+            await self._run(name, fn)
+            await asyncio.sleep(interval * random.uniform(1 - JITTER, 1 + JITTER))
+
+    async def _run(self, name, fn):
+        for _ in range(BUSY_RETRIES):
+            if not interactive_busy():
+                break
+            await asyncio.sleep(BUSY_RETRY_DELAY)
+        else:
+            self.stats[name]["skipped"] += 1
+            return
+        async with self.semaphore:
+            try:
+                await fn()
+                self.stats[name]["runs"] += 1
+            except Exception as e:
+                self.stats[name]["failures"] += 1
+                print(f"Cache warmer job '{name}' failed: {e}")